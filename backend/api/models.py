@@ -4,7 +4,7 @@ Pydantic 資料模型
 定義 API 請求與回應的資料結構
 """
 from pydantic import BaseModel, Field, field_validator
-from typing import List, Optional, Literal
+from typing import List, Optional, Literal, Tuple
 from datetime import date
 from enum import Enum
 
@@ -45,40 +45,32 @@ class InvestmentConfig(BaseModel):
 class BacktestRequest(BaseModel):
     """回測請求"""
 
-    stocks: List[str] = Field(
+    # 使用 tuple 讓股票列表可雜湊，可直接作為快取鍵
+    stocks: Tuple[str, ...] = Field(
         ..., min_length=1, max_length=10, description="股票代碼列表"
     )
-    start_date: str = Field(..., description="起始日期 (YYYY-MM-DD)")
-    end_date: str = Field(..., description="結束日期 (YYYY-MM-DD)")
+    # 日期由 pydantic-core 直接解析 ISO 8601 (YYYY-MM-DD)
+    start_date: date = Field(..., description="起始日期 (YYYY-MM-DD)")
+    end_date: date = Field(..., description="結束日期 (YYYY-MM-DD)")
     strategy: Literal["lump_sum", "dca"] = Field(..., description="投資策略")
     investment: InvestmentConfig = Field(..., description="投資設定")
 
-    @field_validator("start_date", "end_date")
-    @classmethod
-    def validate_date_format(cls, v: str) -> str:
-        """驗證日期格式"""
-        try:
-            date.fromisoformat(v)
-        except ValueError:
-            raise ValueError(f"日期格式錯誤，請使用 YYYY-MM-DD 格式: {v}")
-        return v
-
     @field_validator("stocks")
     @classmethod
-    def validate_stocks(cls, v: List[str]) -> List[str]:
+    def validate_stocks(cls, v: Tuple[str, ...]) -> Tuple[str, ...]:
         """驗證股票代碼"""
         # 移除空白並轉大寫
-        cleaned = [s.strip().upper() for s in v if s.strip()]
+        cleaned = tuple(c for s in v if (c := s.strip().upper()))
         if not cleaned:
             raise ValueError("至少需要一個股票代碼")
         return cleaned
 
 
-class PortfolioHistoryEntry(BaseModel):
-    """投資組合歷史紀錄項目"""
+class PortfolioHistory(BaseModel):
+    """投資組合歷史紀錄（欄式儲存，dates 與 values 一一對應）"""
 
-    date: str = Field(..., description="日期")
-    value: float = Field(..., description="價值")
+    dates: List[str] = Field(default_factory=list, description="日期")
+    values: List[float] = Field(default_factory=list, description="價值")
 
 
 class BacktestResult(BaseModel):
@@ -93,8 +85,8 @@ class BacktestResult(BaseModel):
     sharpe_ratio: float = Field(..., description="夏普比率")
     final_value: float = Field(..., description="最終價值")
     total_invested: float = Field(..., description="總投入金額")
-    portfolio_history: List[PortfolioHistoryEntry] = Field(
-        default_factory=list, description="投資組合價值歷史"
+    portfolio_history: PortfolioHistory = Field(
+        default_factory=PortfolioHistory, description="投資組合價值歷史"
     )
 
 
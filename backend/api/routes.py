@@ -6,25 +6,25 @@ API 路由定義
 - GET /api/stocks/{symbol} - 取得股票資訊
 - POST /api/backtest - 執行回測
 """
-from fastapi import APIRouter, HTTPException, Query
-from typing import List
-from datetime import date
+import asyncio
+import orjson
+import pandas as pd
+from fastapi import APIRouter, HTTPException, Query, Response
+from typing import Dict, List
 
 from api.models import (
     StockInfo,
     StockDetail,
     BacktestRequest,
     BacktestResponse,
-    BacktestResult,
-    BacktestComparison,
-    PortfolioHistoryEntry,
     HealthResponse,
     PredictionResult,
 )
 from services.data_service import (
+    STOCK_NAMES,
     search_stock,
     get_stock_info,
-    get_stock_data,
+    get_multiple_stocks_data,
 )
 from services.backtest_service import (
     backtest_lump_sum,
@@ -36,6 +36,9 @@ from services.prediction.orchestrator import PredictionOrchestrator
 
 router = APIRouter(prefix="/api", tags=["API"])
 
+# 共用同一個預測協調器，讓預測結果快取在請求之間生效
+_orchestrator = PredictionOrchestrator()
+
 
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
@@ -53,7 +56,8 @@ async def search_stocks(
     根據股票代碼或名稱進行搜尋
     """
     results = search_stock(q)
-    return [StockInfo(**r) for r in results]
+    # 搜尋結果欄位由服務層產生，略過逐筆驗證
+    return [StockInfo.model_construct(**r) for r in results]
 
 
 @router.get("/stocks/{symbol}", response_model=StockDetail)
@@ -77,16 +81,54 @@ async def get_stock(symbol: str):
     )
 
 
-@router.post("/backtest", response_model=BacktestResponse)
-async def run_backtest(request: BacktestRequest):
+def _run_symbol_backtest(
+    symbol: str, data: pd.DataFrame, request: BacktestRequest
+) -> Dict:
+    """
+    執行單一股票的回測並附上股票代碼與名稱
+
+    Args:
+        symbol: 股票代碼
+        data: 股票歷史價格 DataFrame
+        request: 回測請求
+
+    Returns:
+        回測結果字典
+    """
+    # 取得股票名稱：預定義清單中的股票不需額外呼叫 API
+    stock_name = STOCK_NAMES.get(symbol)
+    if stock_name is None:
+        stock_info = get_stock_info(symbol)
+        stock_name = stock_info.get("name", symbol) if stock_info else symbol
+
+    # 執行回測
+    if request.strategy == "lump_sum":
+        backtest_result = backtest_lump_sum(data, request.investment.amount)
+    else:  # dca
+        backtest_result = backtest_dca(
+            data, request.investment.amount, request.investment.frequency
+        )
+
+    return {"symbol": symbol, "name": stock_name, **backtest_result}
+
+
+@router.post(
+    "/backtest",
+    response_model=None,
+    responses={200: {"model": BacktestResponse}},
+)
+async def run_backtest(request: BacktestRequest) -> Response:
     """
     執行回測
 
     支援單筆投資 (lump_sum) 和定期定額 (dca) 兩種策略
+
+    回測結果由服務層直接組成字典並以 orjson 序列化，
+    不再建立 BacktestResponse 模型重複驗證（結構仍記載於 OpenAPI 文件）
     """
     # 驗證日期範圍
-    start = date.fromisoformat(request.start_date)
-    end = date.fromisoformat(request.end_date)
+    start = request.start_date
+    end = request.end_date
 
     if start >= end:
         raise HTTPException(status_code=400, detail="起始日期必須早於結束日期")
@@ -98,9 +140,14 @@ async def run_backtest(request: BacktestRequest):
     results = []
     errors = []
 
+    # 批次取得所有股票資料（單次網路往返）；下載為阻塞 I/O，丟到執行緒避免卡住事件迴圈
+    stocks_data = await asyncio.to_thread(
+        get_multiple_stocks_data, request.stocks, start.isoformat(), end.isoformat()
+    )
+
+    valid_symbols = []
     for symbol in request.stocks:
-        # 取得股票資料
-        data = get_stock_data(symbol, request.start_date, request.end_date)
+        data = stocks_data.get(symbol)
 
         if data is None or data.empty:
             errors.append(f"找不到股票 {symbol} 的資料")
@@ -111,42 +158,24 @@ async def run_backtest(request: BacktestRequest):
             errors.append(f"股票 {symbol} 的資料點數不足")
             continue
 
-        # 取得股票名稱
-        stock_info = get_stock_info(symbol)
-        stock_name = stock_info.get("name", symbol) if stock_info else symbol
+        valid_symbols.append(symbol)
 
-        # 執行回測
-        if request.strategy == "lump_sum":
-            backtest_result = backtest_lump_sum(data, request.investment.amount)
-        else:  # dca
-            backtest_result = backtest_dca(
-                data, request.investment.amount, request.investment.frequency
+    # 各股票回測彼此獨立，於執行緒中並行計算，避免阻塞事件迴圈
+    outcomes = await asyncio.gather(
+        *(
+            asyncio.to_thread(
+                _run_symbol_backtest, symbol, stocks_data[symbol], request
             )
+            for symbol in valid_symbols
+        ),
+        return_exceptions=True,
+    )
 
-        # 組裝結果
-        backtest_result["symbol"] = symbol
-        backtest_result["name"] = stock_name
-
-        # 轉換 portfolio_history
-        portfolio_history = [
-            PortfolioHistoryEntry(date=h["date"], value=h["value"])
-            for h in backtest_result.get("portfolio_history", [])
-        ]
-
-        results.append(
-            BacktestResult(
-                symbol=symbol,
-                name=stock_name,
-                total_return=backtest_result["total_return"],
-                cagr=backtest_result["cagr"],
-                max_drawdown=backtest_result["max_drawdown"],
-                volatility=backtest_result["volatility"],
-                sharpe_ratio=backtest_result["sharpe_ratio"],
-                final_value=backtest_result["final_value"],
-                total_invested=backtest_result["total_invested"],
-                portfolio_history=portfolio_history,
-            )
-        )
+    for symbol, outcome in zip(valid_symbols, outcomes):
+        if isinstance(outcome, Exception):
+            errors.append(f"股票 {symbol} 回測失敗: {outcome}")
+            continue
+        results.append(outcome)
 
     # 如果所有股票都失敗
     if not results:
@@ -156,16 +185,20 @@ async def run_backtest(request: BacktestRequest):
         raise HTTPException(status_code=404, detail=error_msg)
 
     # 比較結果
-    comparison_data = compare_results([r.model_dump() for r in results])
-    comparison = BacktestComparison(
-        best_performer=comparison_data.get("best_performer"),
-        highest_return=comparison_data.get("highest_return"),
-        lowest_risk=comparison_data.get("lowest_risk"),
-        best_sharpe=comparison_data.get("best_sharpe"),
+    comparison_data = compare_results(results)
+    comparison = {
+        "best_performer": comparison_data.get("best_performer"),
+        "highest_return": comparison_data.get("highest_return"),
+        "lowest_risk": comparison_data.get("lowest_risk"),
+        "best_sharpe": comparison_data.get("best_sharpe"),
+    }
+
+    payload = {"results": results, "comparison": comparison}
+    return Response(
+        content=orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY),
+        media_type="application/json",
     )
 
-    return BacktestResponse(results=results, comparison=comparison)
-
 @router.get("/predict/{symbol}", response_model=PredictionResult)
 async def predict_stock(symbol: str):
     """
@@ -174,8 +207,7 @@ async def predict_stock(symbol: str):
     結合基本面與消息面進行綜合評分
     """
     try:
-        orchestrator = PredictionOrchestrator()
-        result = await orchestrator.predict(symbol.upper())
+        result = await _orchestrator.predict(symbol.upper())
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"預測分析失敗: {str(e)}")
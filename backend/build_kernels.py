@@ -0,0 +1,57 @@
+"""
+預先（AOT）編譯回測指標的 Numba 核心
+
+執行後在 utils/ 產生 _aot_kernels 原生擴充模組，
+utils.calculations（回測服務亦經由此模組計算指標）匯入時會優先使用，
+省去 JIT 編譯或載入快取的時間（部署後第一個請求不必等待）。
+未產生此模組時自動退回 @njit 或 NumPy 實作。
+
+只匯出 float64 版本（各指標函式皆以 float64 計算）。
+
+用法: python build_kernels.py
+"""
+import sys
+import os
+
+# Ensure we can import from current directory
+sys.path.append(os.getcwd())
+
+import numba.pycc.compiler
+from numba.core.compiler import Flags
+from numba.pycc import CC
+
+from utils.calculations import _max_drawdown_loop, _mean_std_loop, _metrics_loop
+
+
+class _NumpyErrorModelFlags(Flags):
+    """
+    pycc 不提供編譯選項，這裡讓匯出函式與 JIT 版本的選項一致：
+    numpy 錯誤模式（除以 0 得到 inf / NaN 而非拋出 ZeroDivisionError），
+    並在執行時釋放 GIL（同 nogil=True）
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.error_model = "numpy"
+        self.release_gil = True
+
+
+def main():
+    numba.pycc.compiler.Flags = _NumpyErrorModelFlags
+
+    cc = CC("_aot_kernels")
+    cc.output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "utils")
+
+    cc.export("max_drawdown", "f8(f8[:])")(_max_drawdown_loop.py_func)
+    cc.export("mean_std", "UniTuple(f8, 2)(f8[:])")(_mean_std_loop.py_func)
+    cc.export("metrics", "UniTuple(f8, 6)(f8[:], f8[:], f8, f8, f8)")(
+        _metrics_loop.py_func
+    )
+
+    print("Compiling AOT kernels...")
+    cc.compile()
+    print(f"Saved to {cc.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,16 +3,58 @@ BackTester API 主程式
 
 投資回測系統的後端 API 服務
 """
+import asyncio
 import os
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
 from api.routes import router
+from services.prediction.finbert_service import get_finbert_service
 
 # 載入環境變數
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+
+def _log_preload_failure(task: asyncio.Task) -> None:
+    """背景預先載入失敗時記錄警告（之後的預測請求會再嘗試載入）"""
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"FinBERT preload skipped: {task.exception()}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    應用程式生命週期
+
+    設定 PRELOAD_FINBERT=true 時於背景預先載入 FinBERT 模型（不阻塞啟動），
+    避免第一個預測請求承擔模型載入延遲；
+    設定 TORCH_NUM_THREADS 時限制 torch 的 CPU 執行緒數
+    """
+    num_threads = os.getenv("TORCH_NUM_THREADS")
+    if num_threads:
+        try:
+            import torch
+
+            # 多個 uvicorn worker 時避免 CPU 執行緒超額使用
+            torch.set_num_threads(int(num_threads))
+        except Exception as e:
+            logger.warning(f"TORCH_NUM_THREADS ignored: {e}")
+
+    preload = None
+    if os.getenv("PRELOAD_FINBERT", "false").lower() == "true":
+        # 模型下載與載入為阻塞操作，丟到執行緒於背景執行
+        preload = asyncio.create_task(asyncio.to_thread(get_finbert_service))
+        preload.add_done_callback(_log_preload_failure)
+    yield
+    if preload is not None:
+        preload.cancel()
+
+
 # 建立 FastAPI 應用
 app = FastAPI(
     title="BackTester API",
@@ -20,6 +62,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # CORS 設定
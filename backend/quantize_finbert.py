@@ -0,0 +1,35 @@
+"""
+離線將 FinBERT ONNX 模型動態量化為 int8
+
+執行後在 ONNX_MODEL_DIR 產生 model_quantized.onnx，
+FinBertService 於 CPU 上會優先載入量化模型。
+
+用法: python quantize_finbert.py
+"""
+import sys
+import os
+
+# Ensure we can import from current directory
+sys.path.append(os.getcwd())
+
+from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+from services.prediction.finbert_service import MODEL_NAME, ONNX_MODEL_DIR
+
+
+def main():
+    if not (ONNX_MODEL_DIR / "model.onnx").exists():
+        print(f"Exporting {MODEL_NAME} to ONNX...")
+        model = ORTModelForSequenceClassification.from_pretrained(MODEL_NAME, export=True)
+        model.save_pretrained(ONNX_MODEL_DIR)
+
+    print("Quantizing to int8 (dynamic)...")
+    quantizer = ORTQuantizer.from_pretrained(ONNX_MODEL_DIR, file_name="model.onnx")
+    config = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+    quantizer.quantize(save_dir=ONNX_MODEL_DIR, quantization_config=config)
+    print(f"Saved to {ONNX_MODEL_DIR / 'model_quantized.onnx'}")
+
+
+if __name__ == "__main__":
+    main()
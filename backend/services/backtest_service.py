@@ -10,14 +10,7 @@ import numpy as np
 from typing import Dict, List, Optional
 from datetime import datetime
 
-from utils.calculations import (
-    calculate_cagr,
-    calculate_max_drawdown,
-    calculate_volatility,
-    calculate_sharpe_ratio,
-    calculate_total_return,
-    calculate_daily_returns,
-)
+from utils.calculations import calculate_metrics_from_arrays
 
 
 def backtest_lump_sum(data: pd.DataFrame, amount: float) -> Dict:
@@ -46,43 +39,26 @@ def backtest_lump_sum(data: pd.DataFrame, amount: float) -> Dict:
 
     # 取得收盤價序列
     prices = data["Close"]
+    price_values = prices.to_numpy(dtype=np.float64)
 
     # 計算可購買股數（以第一天收盤價購買）
-    initial_price = prices.iloc[0]
-    shares = amount / initial_price
+    shares = amount / price_values[0]
 
     # 計算每日投資組合價值
-    portfolio_values = shares * prices
+    portfolio_values = shares * price_values
 
-    # 計算日報酬率
-    daily_returns = calculate_daily_returns(prices)
-
-    # 計算各項指標
-    final_value = portfolio_values.iloc[-1]
-    total_return = calculate_total_return(amount, final_value)
-
-    # 計算投資年數
+    # 計算投資天數
     days = (prices.index[-1] - prices.index[0]).days
-    years = days / 365.25
 
-    cagr = calculate_cagr(amount, final_value, years) if years > 0 else 0
-    max_drawdown = calculate_max_drawdown(portfolio_values)
-    volatility = calculate_volatility(daily_returns)
-    sharpe_ratio = calculate_sharpe_ratio(daily_returns)
+    # 計算各項指標
+    result = _compute_metrics(portfolio_values, price_values, amount, days)
 
     # 建立投資組合歷史紀錄
-    portfolio_history = _build_portfolio_history(portfolio_values)
+    result["portfolio_history"] = _build_portfolio_history(
+        pd.Series(portfolio_values, index=prices.index)
+    )
 
-    return {
-        "final_value": round(final_value, 2),
-        "total_return": round(total_return * 100, 2),
-        "cagr": round(cagr * 100, 2),
-        "max_drawdown": round(max_drawdown * 100, 2),
-        "volatility": round(volatility * 100, 2),
-        "sharpe_ratio": round(sharpe_ratio, 2),
-        "total_invested": round(amount, 2),
-        "portfolio_history": portfolio_history,
-    }
+    return result
 
 
 def backtest_dca(
@@ -106,79 +82,82 @@ def backtest_dca(
 
     prices = data["Close"]
 
-    # 根據頻率取得投資日期
-    if frequency == "weekly":
-        # 取得每週第一個交易日
-        investment_dates = prices.groupby(
-            pd.Grouper(freq="W-MON")
-        ).apply(lambda x: x.index[0] if len(x) > 0 else None)
-        investment_dates = investment_dates.dropna()
-    else:
-        # 預設為每月第一個交易日
-        investment_dates = prices.groupby(
-            pd.Grouper(freq="MS")
-        ).apply(lambda x: x.index[0] if len(x) > 0 else None)
-        investment_dates = investment_dates.dropna()
-
-    # 初始化
-    total_shares = 0.0
-    total_invested = 0.0
-    investment_records = []
-
-    # 執行定期定額投資
-    for invest_date in investment_dates:
-        if invest_date in prices.index:
-            price = prices.loc[invest_date]
-            shares_bought = monthly_amount / price
-            total_shares += shares_bought
-            total_invested += monthly_amount
-            investment_records.append(
-                {
-                    "date": invest_date,
-                    "price": price,
-                    "shares_bought": shares_bought,
-                    "total_shares": total_shares,
-                    "invested": total_invested,
-                }
-            )
-
-    if total_invested == 0:
+    # 根據頻率取得投資日期（每週或每月第一個交易日）
+    # 對日期索引本身 resample，取得的是實際交易日而非區間標籤
+    freq = "W-MON" if frequency == "weekly" else "MS"
+    investment_dates = pd.DatetimeIndex(
+        prices.index.to_series().resample(freq).first().dropna()
+    )
+
+    if len(investment_dates) == 0:
         return _empty_result()
 
+    # 以向量化方式計算每日持股數量：
+    # 在每個投資日加上當期買入股數，再做累加
+    price_values = prices.to_numpy(dtype=np.float64)
+    invest_positions = prices.index.searchsorted(investment_dates)
+    shares_bought = monthly_amount / price_values[invest_positions]
+
+    share_deltas = np.zeros(len(price_values))
+    np.add.at(share_deltas, invest_positions, shares_bought)
+    cum_shares = np.cumsum(share_deltas)
+
     # 計算每日投資組合價值
-    # 需要追蹤每個時點的持股數量
-    portfolio_values = _calculate_dca_portfolio_values(
-        prices, investment_records, monthly_amount
+    portfolio_values = cum_shares * price_values
+    total_invested = shares_bought.size * monthly_amount
+
+    # 從第一筆投資到最後一天
+    first_invest_position = invest_positions[0]
+    days = (prices.index[-1] - prices.index[first_invest_position]).days
+
+    # 計算各項指標（日報酬率從有投資之後開始計算）
+    result = _compute_metrics(
+        portfolio_values,
+        price_values[first_invest_position:],
+        total_invested,
+        days,
+    )
+
+    # 建立投資組合歷史紀錄
+    result["portfolio_history"] = _build_portfolio_history(
+        pd.Series(portfolio_values, index=prices.index)
     )
 
-    # 計算日報酬率（從有投資之後開始計算）
-    if len(investment_records) > 0:
-        first_invest_date = investment_records[0]["date"]
-        valid_prices = prices.loc[first_invest_date:]
-        daily_returns = calculate_daily_returns(valid_prices)
-    else:
-        daily_returns = pd.Series([], dtype=float)
+    return result
 
-    # 計算各項指標
-    final_value = portfolio_values.iloc[-1]
-    total_return = calculate_total_return(total_invested, final_value)
-
-    # 計算投資年數（從第一筆投資到最後一天）
-    if len(investment_records) > 0:
-        first_date = investment_records[0]["date"]
-        last_date = prices.index[-1]
-        days = (last_date - first_date).days
-        years = days / 365.25
-    else:
-        years = 0
-
-    cagr = calculate_cagr(total_invested, final_value, years) if years > 0 else 0
-    max_drawdown = calculate_max_drawdown(portfolio_values)
-    volatility = calculate_volatility(daily_returns)
-    sharpe_ratio = calculate_sharpe_ratio(daily_returns)
 
-    # 建立投資組合歷史紀錄
-    portfolio_history = _build_portfolio_history(portfolio_values)
+def _compute_metrics(
+    portfolio_values: np.ndarray,
+    prices: np.ndarray,
+    total_invested: float,
+    days: int,
+    risk_free_rate: float = 0.02,
+) -> Dict:
+    """
+    一次計算所有回測指標
+
+    直接在 NumPy 陣列上運算，避免逐一呼叫 utils.calculations 的各指標函式
+    時重複建立 pandas Series 與多次走訪資料（核心與 calculate_metrics 共用）
+
+    Args:
+        portfolio_values: 每日投資組合價值
+        prices: 用於計算日報酬率的價格序列
+        total_invested: 總投入金額
+        days: 投資天數
+        risk_free_rate: 無風險利率（年化，預設 2%）
+
+    Returns:
+        回測結果字典（不含 portfolio_history），數值已四捨五入
+    """
+    final_value, total_return, cagr, max_drawdown, volatility, sharpe_ratio = (
+        calculate_metrics_from_arrays(
+            np.asarray(portfolio_values, dtype=np.float64),
+            np.asarray(prices, dtype=np.float64),
+            total_invested,
+            days / 365.25,
+            risk_free_rate,
+        )
+    )
 
     return {
         "final_value": round(final_value, 2),
@@ -188,42 +167,10 @@ def backtest_dca(
         "volatility": round(volatility * 100, 2),
         "sharpe_ratio": round(sharpe_ratio, 2),
         "total_invested": round(total_invested, 2),
-        "portfolio_history": portfolio_history,
     }
 
 
-def _calculate_dca_portfolio_values(
-    prices: pd.Series, investment_records: List[Dict], monthly_amount: float
-) -> pd.Series:
-    """
-    計算定期定額投資的每日組合價值
-
-    Args:
-        prices: 價格序列
-        investment_records: 投資紀錄列表
-        monthly_amount: 每期投資金額
-
-    Returns:
-        每日投資組合價值序列
-    """
-    if not investment_records:
-        return pd.Series([0.0] * len(prices), index=prices.index)
-
-    # 建立持股數量的時間序列
-    shares_series = pd.Series(0.0, index=prices.index)
-
-    for record in investment_records:
-        invest_date = record["date"]
-        # 從投資日開始，持股數增加
-        shares_series.loc[invest_date:] = record["total_shares"]
-
-    # 計算每日組合價值
-    portfolio_values = shares_series * prices
-
-    return portfolio_values
-
-
-def _build_portfolio_history(portfolio_values: pd.Series) -> List[Dict]:
+def _build_portfolio_history(portfolio_values: pd.Series) -> Dict[str, List]:
     """
     建立投資組合歷史紀錄
 
@@ -233,46 +180,36 @@ def _build_portfolio_history(portfolio_values: pd.Series) -> List[Dict]:
         portfolio_values: 投資組合價值序列
 
     Returns:
-        歷史紀錄列表，每項包含 date 和 value
+        欄式歷史紀錄 {"dates": [...], "values": [...]}，兩者長度相同
     """
     if len(portfolio_values) == 0:
-        return []
+        return {"dates": [], "values": []}
 
     # 如果資料點少於100，全部輸出
     if len(portfolio_values) <= 100:
-        return [
-            {"date": date.strftime("%Y-%m-%d"), "value": round(value, 2)}
-            for date, value in portfolio_values.items()
-        ]
-
-    # 否則，每月取最後一個交易日的資料
-    monthly = portfolio_values.groupby(pd.Grouper(freq="ME")).last()
-
-    # 確保包含第一天和最後一天
-    history = [
-        {
-            "date": portfolio_values.index[0].strftime("%Y-%m-%d"),
-            "value": round(portfolio_values.iloc[0], 2),
+        return {
+            "dates": portfolio_values.index.strftime("%Y-%m-%d").tolist(),
+            "values": np.round(portfolio_values.to_numpy(dtype=np.float64), 2).tolist(),
         }
-    ]
 
-    for date, value in monthly.items():
-        if pd.notna(value):
-            history.append(
-                {"date": date.strftime("%Y-%m-%d"), "value": round(value, 2)}
-            )
+    # 否則，每月取最後一個交易日的資料（以遮罩排除沒有資料的月份）
+    monthly = portfolio_values.resample("ME").last()
+    monthly_values = monthly.to_numpy(dtype=np.float64)
+    mask = ~np.isnan(monthly_values)
+
+    # 確保包含第一天
+    dates = [portfolio_values.index[0].strftime("%Y-%m-%d")]
+    dates.extend(monthly.index[mask].strftime("%Y-%m-%d").tolist())
+    values = [round(float(portfolio_values.iloc[0]), 2)]
+    values.extend(np.round(monthly_values[mask], 2).tolist())
 
     # 確保最後一天有資料
     last_date = portfolio_values.index[-1].strftime("%Y-%m-%d")
-    if history[-1]["date"] != last_date:
-        history.append(
-            {
-                "date": last_date,
-                "value": round(portfolio_values.iloc[-1], 2),
-            }
-        )
+    if dates[-1] != last_date:
+        dates.append(last_date)
+        values.append(round(float(portfolio_values.iloc[-1]), 2))
 
-    return history
+    return {"dates": dates, "values": values}
 
 
 def _empty_result() -> Dict:
@@ -285,7 +222,7 @@ def _empty_result() -> Dict:
         "volatility": 0.0,
         "sharpe_ratio": 0.0,
         "total_invested": 0.0,
-        "portfolio_history": [],
+        "portfolio_history": {"dates": [], "values": []},
     }
 
 
@@ -293,6 +230,9 @@ def compare_results(results: List[Dict]) -> Dict:
     """
     比較多個回測結果
 
+    只讀取 symbol, total_return, volatility, sharpe_ratio 欄位，
+    可直接傳入回測函式的輸出字典，不需先複製或移除 portfolio_history
+
     Args:
         results: 回測結果列表
 
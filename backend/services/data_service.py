@@ -6,13 +6,77 @@
 - 取得歷史價格
 - 取得股票資訊
 """
-import yfinance as yf
+import logging
+import os
+import re
+import time
+import threading
 import pandas as pd
+from cachetools import TTLCache, cached
+from cachetools.keys import hashkey
+from pathlib import Path
 from typing import List, Dict, Optional
-from functools import lru_cache
 from datetime import datetime, timedelta
 
 
+# yfinance 匯入耗時，於各函式內延遲匯入以縮短啟動時間
+
+logger = logging.getLogger(__name__)
+
+# 歷史資料磁碟快取設定：預設位於 backend/.cache，不隨啟動時的工作目錄改變
+CACHE_DIR = Path(
+    os.getenv("STOCK_CACHE_DIR", Path(__file__).resolve().parent.parent / ".cache")
+)
+CACHE_EXPIRE_SECONDS = int(os.getenv("STOCK_CACHE_EXPIRE", "3600"))
+
+# 歷史資料記憶體快取（盤中價格仍會變動，以 TTL 限制資料過期時間）
+_data_cache = TTLCache(maxsize=256, ttl=900)
+_data_cache_lock = threading.Lock()
+
+# 股票資訊快取（同一回測或短時間內重複查詢時直接使用記憶體中的結果）
+_info_cache = TTLCache(maxsize=512, ttl=300)
+
+# 預定義的常用股票清單
+STOCK_LIST = (
+    # 台股
+    {"symbol": "2330.TW", "name": "台積電", "exchange": "TWSE"},
+    {"symbol": "2317.TW", "name": "鴻海", "exchange": "TWSE"},
+    {"symbol": "2454.TW", "name": "聯發科", "exchange": "TWSE"},
+    {"symbol": "2308.TW", "name": "台達電", "exchange": "TWSE"},
+    {"symbol": "2881.TW", "name": "富邦金", "exchange": "TWSE"},
+    {"symbol": "2882.TW", "name": "國泰金", "exchange": "TWSE"},
+    {"symbol": "2412.TW", "name": "中華電", "exchange": "TWSE"},
+    {"symbol": "0050.TW", "name": "元大台灣50", "exchange": "TWSE"},
+    {"symbol": "0056.TW", "name": "元大高股息", "exchange": "TWSE"},
+    {"symbol": "006208.TW", "name": "富邦台50", "exchange": "TWSE"},
+    # 美股 ETF
+    {"symbol": "QQQ", "name": "Invesco QQQ Trust", "exchange": "NASDAQ"},
+    {"symbol": "SPY", "name": "SPDR S&P 500 ETF", "exchange": "NYSE"},
+    {"symbol": "VOO", "name": "Vanguard S&P 500 ETF", "exchange": "NYSE"},
+    {"symbol": "VTI", "name": "Vanguard Total Stock Market ETF", "exchange": "NYSE"},
+    {"symbol": "VT", "name": "Vanguard Total World Stock ETF", "exchange": "NYSE"},
+    {"symbol": "VGT", "name": "Vanguard Information Technology ETF", "exchange": "NYSE"},
+    {"symbol": "ARKK", "name": "ARK Innovation ETF", "exchange": "NYSE"},
+    # 美股個股
+    {"symbol": "AAPL", "name": "Apple Inc.", "exchange": "NASDAQ"},
+    {"symbol": "MSFT", "name": "Microsoft Corporation", "exchange": "NASDAQ"},
+    {"symbol": "GOOGL", "name": "Alphabet Inc.", "exchange": "NASDAQ"},
+    {"symbol": "AMZN", "name": "Amazon.com Inc.", "exchange": "NASDAQ"},
+    {"symbol": "NVDA", "name": "NVIDIA Corporation", "exchange": "NASDAQ"},
+    {"symbol": "TSLA", "name": "Tesla Inc.", "exchange": "NASDAQ"},
+    {"symbol": "META", "name": "Meta Platforms Inc.", "exchange": "NASDAQ"},
+    {"symbol": "TSM", "name": "Taiwan Semiconductor (ADR)", "exchange": "NYSE"},
+)
+
+# 預定義股票的代碼與名稱對照，回測時可不必再呼叫 API 取得名稱
+STOCK_NAMES = {stock["symbol"]: stock["name"] for stock in STOCK_LIST}
+
+# 搜尋索引：預先轉為小寫，避免每次查詢重複處理
+_STOCK_INDEX = tuple(
+    (stock["symbol"].lower(), stock["name"].lower(), stock) for stock in STOCK_LIST
+)
+
+
 def get_stock_data(
     symbol: str, start_date: str, end_date: str
 ) -> Optional[pd.DataFrame]:
@@ -28,27 +92,94 @@ def get_stock_data(
         包含 Open, High, Low, Close, Volume 欄位的 DataFrame
         若無資料則返回 None
     """
+    cached = _read_cache(symbol, start_date, end_date)
+    if cached is not None:
+        return cached
+
+    import yfinance as yf
+
     try:
         ticker = yf.Ticker(symbol)
         hist = ticker.history(start=start_date, end=end_date)
 
-        if hist.empty:
-            return None
+        data = _clean_history(hist)
+        _write_cache(symbol, start_date, end_date, data)
+        return data
+
+    except Exception as e:
+        print(f"Error fetching data for {symbol}: {e}")
+        return None
 
-        # 確保索引是日期格式，並移除時區資訊
-        hist.index = pd.to_datetime(hist.index).tz_localize(None)
 
-        # 只保留需要的欄位
-        columns_to_keep = ["Open", "High", "Low", "Close", "Volume"]
-        available_columns = [col for col in columns_to_keep if col in hist.columns]
+def _clean_history(hist: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
+    """
+    整理 yfinance 回傳的歷史資料
 
-        return hist[available_columns]
+    Args:
+        hist: 原始歷史價格 DataFrame
 
+    Returns:
+        移除時區並只保留 Open, High, Low, Close, Volume 欄位的 DataFrame
+        若無資料則返回 None
+    """
+    if hist is None or hist.empty:
+        return None
+
+    # 確保索引是日期格式，並移除時區資訊
+    hist.index = pd.to_datetime(hist.index).tz_localize(None)
+
+    # 只保留需要的欄位
+    columns_to_keep = ["Open", "High", "Low", "Close", "Volume"]
+    available_columns = [col for col in columns_to_keep if col in hist.columns]
+
+    return hist[available_columns]
+
+
+def _cache_path(symbol: str, start_date: str, end_date: str) -> Path:
+    """取得 (symbol, start, end) 對應的快取檔案路徑"""
+    safe_symbol = re.sub(r"[^A-Za-z0-9._-]", "_", symbol)
+    return CACHE_DIR / f"{safe_symbol}_{start_date}_{end_date}.csv"
+
+
+def _read_cache(
+    symbol: str, start_date: str, end_date: str
+) -> Optional[pd.DataFrame]:
+    """
+    讀取磁碟快取的歷史資料
+
+    快取以 CSV 儲存：讀取時只解析數值，不像 pickle 會執行檔案中的程式碼
+
+    Returns:
+        快取的 DataFrame，若不存在或已過期則返回 None
+    """
+    path = _cache_path(symbol, start_date, end_date)
+    try:
+        if time.time() - path.stat().st_mtime > CACHE_EXPIRE_SECONDS:
+            return None
+        # round_trip：浮點數還原為與寫入前完全相同的值
+        return pd.read_csv(
+            path, index_col=0, parse_dates=True, float_precision="round_trip"
+        )
+    except FileNotFoundError:
+        return None
     except Exception as e:
-        print(f"Error fetching data for {symbol}: {e}")
+        logger.warning("Error reading cache for %s: %s", symbol, e)
         return None
 
 
+def _write_cache(
+    symbol: str, start_date: str, end_date: str, data: Optional[pd.DataFrame]
+) -> None:
+    """將歷史資料寫入磁碟快取（無資料時不寫入）"""
+    if data is None or data.empty:
+        return
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        data.to_csv(_cache_path(symbol, start_date, end_date))
+    except Exception as e:
+        logger.warning("Error writing cache for %s: %s", symbol, e)
+
+
 def search_stock(query: str) -> List[Dict]:
     """
     搜尋股票代碼
@@ -61,47 +192,12 @@ def search_stock(query: str) -> List[Dict]:
     Returns:
         符合的股票列表，每項包含 symbol, name, exchange
     """
-    # 預定義的常用股票清單
-    stock_list = [
-        # 台股
-        {"symbol": "2330.TW", "name": "台積電", "exchange": "TWSE"},
-        {"symbol": "2317.TW", "name": "鴻海", "exchange": "TWSE"},
-        {"symbol": "2454.TW", "name": "聯發科", "exchange": "TWSE"},
-        {"symbol": "2308.TW", "name": "台達電", "exchange": "TWSE"},
-        {"symbol": "2881.TW", "name": "富邦金", "exchange": "TWSE"},
-        {"symbol": "2882.TW", "name": "國泰金", "exchange": "TWSE"},
-        {"symbol": "2412.TW", "name": "中華電", "exchange": "TWSE"},
-        {"symbol": "0050.TW", "name": "元大台灣50", "exchange": "TWSE"},
-        {"symbol": "0056.TW", "name": "元大高股息", "exchange": "TWSE"},
-        {"symbol": "006208.TW", "name": "富邦台50", "exchange": "TWSE"},
-        # 美股 ETF
-        {"symbol": "QQQ", "name": "Invesco QQQ Trust", "exchange": "NASDAQ"},
-        {"symbol": "SPY", "name": "SPDR S&P 500 ETF", "exchange": "NYSE"},
-        {"symbol": "VOO", "name": "Vanguard S&P 500 ETF", "exchange": "NYSE"},
-        {"symbol": "VTI", "name": "Vanguard Total Stock Market ETF", "exchange": "NYSE"},
-        {"symbol": "VT", "name": "Vanguard Total World Stock ETF", "exchange": "NYSE"},
-        {"symbol": "VGT", "name": "Vanguard Information Technology ETF", "exchange": "NYSE"},
-        {"symbol": "ARKK", "name": "ARK Innovation ETF", "exchange": "NYSE"},
-        # 美股個股
-        {"symbol": "AAPL", "name": "Apple Inc.", "exchange": "NASDAQ"},
-        {"symbol": "MSFT", "name": "Microsoft Corporation", "exchange": "NASDAQ"},
-        {"symbol": "GOOGL", "name": "Alphabet Inc.", "exchange": "NASDAQ"},
-        {"symbol": "AMZN", "name": "Amazon.com Inc.", "exchange": "NASDAQ"},
-        {"symbol": "NVDA", "name": "NVIDIA Corporation", "exchange": "NASDAQ"},
-        {"symbol": "TSLA", "name": "Tesla Inc.", "exchange": "NASDAQ"},
-        {"symbol": "META", "name": "Meta Platforms Inc.", "exchange": "NASDAQ"},
-        {"symbol": "TSM", "name": "Taiwan Semiconductor (ADR)", "exchange": "NYSE"},
-    ]
-
     query_lower = query.lower()
-    results = []
-
-    for stock in stock_list:
-        if (
-            query_lower in stock["symbol"].lower()
-            or query_lower in stock["name"].lower()
-        ):
-            results.append(stock)
+    results = [
+        stock
+        for symbol_lower, name_lower, stock in _STOCK_INDEX
+        if query_lower in symbol_lower or query_lower in name_lower
+    ]
 
     # 如果預定義清單中找不到，嘗試從 yfinance 取得資訊
     if not results and len(query) >= 1:
@@ -118,9 +214,10 @@ def search_stock(query: str) -> List[Dict]:
     return results
 
 
+@cached(_info_cache, lock=threading.Lock())
 def get_stock_info(symbol: str) -> Optional[Dict]:
     """
-    取得股票基本資訊
+    取得股票基本資訊（帶 TTL 快取，5 分鐘內重複查詢不會再呼叫 API）
 
     Args:
         symbol: 股票代碼
@@ -129,6 +226,8 @@ def get_stock_info(symbol: str) -> Optional[Dict]:
         包含 symbol, name, current_price, currency, market 的字典
         若無資料則返回 None
     """
+    import yfinance as yf
+
     try:
         ticker = yf.Ticker(symbol)
         info = ticker.info
@@ -161,14 +260,14 @@ def get_stock_info(symbol: str) -> Optional[Dict]:
         return None
 
 
-@lru_cache(maxsize=100)
+@cached(_data_cache, lock=_data_cache_lock)
 def get_stock_data_cached(
     symbol: str, start_date: str, end_date: str
 ) -> Optional[pd.DataFrame]:
     """
     取得股票歷史價格資料（帶快取）
 
-    使用 LRU 快取減少重複的 API 呼叫
+    先查記憶體 TTL 快取（15 分鐘），未命中時由 get_stock_data 讀取磁碟快取或呼叫 API
 
     Args:
         symbol: 股票代碼
@@ -191,6 +290,8 @@ def validate_symbol(symbol: str) -> bool:
     Returns:
         True 如果股票代碼有效，否則 False
     """
+    import yfinance as yf
+
     try:
         ticker = yf.Ticker(symbol)
         hist = ticker.history(period="5d")
@@ -205,15 +306,75 @@ def get_multiple_stocks_data(
     """
     批次取得多個股票的歷史資料
 
+    使用單次 yf.download 呼叫取得所有股票資料，再依股票代碼切分，
+    避免每個股票各自發出一次 HTTP 請求
+
     Args:
         symbols: 股票代碼列表
         start_date: 起始日期
         end_date: 結束日期
 
     Returns:
-        字典，key 為股票代碼，value 為對應的 DataFrame
+        字典，key 為股票代碼，value 為對應的 DataFrame（無資料則為 None）
     """
+    symbols = list(symbols)
+    if not symbols:
+        return {}
+
+    # 依序查詢記憶體快取與磁碟快取，只下載快取未命中的股票
     results = {}
     for symbol in symbols:
-        results[symbol] = get_stock_data(symbol, start_date, end_date)
+        key = hashkey(symbol, start_date, end_date)
+        with _data_cache_lock:
+            cached_data = _data_cache.get(key)
+        if cached_data is None:
+            cached_data = _read_cache(symbol, start_date, end_date)
+            if cached_data is not None:
+                with _data_cache_lock:
+                    _data_cache[key] = cached_data
+        if cached_data is not None:
+            results[symbol] = cached_data
+
+    missing = [symbol for symbol in symbols if symbol not in results]
+    if not missing:
+        return results
+
+    import yfinance as yf
+
+    try:
+        # auto_adjust=True 與 Ticker.history 的預設一致
+        raw = yf.download(
+            tickers=missing,
+            start=start_date,
+            end=end_date,
+            group_by="ticker",
+            threads=True,
+            auto_adjust=True,
+            progress=False,
+        )
+    except Exception as e:
+        logger.warning("Error fetching data for %s: %s", missing, e)
+        results.update({symbol: None for symbol in missing})
+        return results
+
+    for symbol in missing:
+        if raw is None or raw.empty:
+            results[symbol] = None
+            continue
+
+        if isinstance(raw.columns, pd.MultiIndex):
+            # group_by="ticker" 時第一層為股票代碼
+            if symbol not in raw.columns.get_level_values(0):
+                results[symbol] = None
+                continue
+            df = raw[symbol]
+        else:
+            df = raw
+
+        results[symbol] = _clean_history(df.dropna(how="all"))
+        _write_cache(symbol, start_date, end_date, results[symbol])
+        if results[symbol] is not None:
+            with _data_cache_lock:
+                _data_cache[hashkey(symbol, start_date, end_date)] = results[symbol]
+
     return results
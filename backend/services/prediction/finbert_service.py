@@ -1,74 +1,180 @@
-import torch
-from transformers import BertTokenizer, BertForSequenceClassification, pipeline
-from typing import List, Dict
+from typing import List
+from pathlib import Path
+import contextlib
+import functools
 import logging
+import os
+import threading
+
+import numpy as np
 
 # 設定 logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+MODEL_NAME = "ProsusAI/finbert"
+
+# 匯出後的 ONNX 模型存放位置（首次載入時匯出，之後直接讀取）
+ONNX_MODEL_DIR = Path(os.getenv("FINBERT_ONNX_DIR", ".cache/finbert-onnx"))
+
+# int8 量化後的模型檔名（由 quantize_finbert.py 產生）
+ONNX_QUANTIZED_FILE = "model_quantized.onnx"
+
+# ONNX Runtime 運算執行緒數，預設使用一半的 CPU 核心
+ORT_NUM_THREADS = int(os.getenv("ORT_NUM_THREADS", max(1, (os.cpu_count() or 2) // 2)))
+
+
 class FinBertService:
+    # 新聞標題很短，截斷至 MAX_LENGTH 個 token，並只 padding 到批次內最長的標題
+    BATCH_SIZE = 32
+    MAX_LENGTH = 64
+
+    # analyze_sentiment 輸出矩陣的固定欄位順序
+    LABELS = ("negative", "neutral", "positive")
+    NEG, NEU, POS = 0, 1, 2
+
     _instance = None
+    # 背景預先載入與預測請求可能同時建立實例，只載入一次模型
+    _instance_lock = threading.Lock()
     _model = None
     _tokenizer = None
-    _pipeline = None
+    _device = "cpu"
+    # 依 LABELS 順序取出模型 logits 的欄位索引（模型 id2label 順序不同）
+    _label_columns = None
 
     def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(FinBertService, cls).__new__(cls)
-            cls._instance._initialize_model()
+        with cls._instance_lock:
+            if cls._instance is None:
+                instance = super(FinBertService, cls).__new__(cls)
+                instance._initialize_model()
+                # 載入成功後才保存，載入失敗時下次呼叫可重試
+                cls._instance = instance
         return cls._instance
 
     def _initialize_model(self):
         """初始化 FinBERT 模型"""
         try:
+            # torch / transformers 載入耗時且佔用大量記憶體，延遲到實際使用時才匯入
+            import torch
+            from transformers import BertTokenizerFast, BertForSequenceClassification
+
             logger.info("Loading FinBERT model...")
-            model_name = "ProsusAI/finbert"
-            
-            self._tokenizer = BertTokenizer.from_pretrained(model_name)
-            self._model = BertForSequenceClassification.from_pretrained(model_name)
             
-            # 建立 pipeline
-            self._pipeline = pipeline(
-                "sentiment-analysis", 
-                model=self._model, 
-                tokenizer=self._tokenizer,
-                return_all_scores=True
-            )
+            # Fast tokenizer 由 Rust 實作，斷詞速度較快
+            self._tokenizer = BertTokenizerFast.from_pretrained(MODEL_NAME)
+
+            if torch.cuda.is_available():
+                # GPU: 使用 FP16 權重，推論更快且記憶體減半
+                model = BertForSequenceClassification.from_pretrained(MODEL_NAME)
+                self._model = model.eval().to("cuda").half()
+                self._device = "cuda"
+            else:
+                # CPU: 優先使用 ONNX Runtime，未安裝時退回 PyTorch
+                self._model = self._load_onnx_model()
+                if self._model is None:
+                    # 將 Linear 層動態量化為 int8
+                    model = BertForSequenceClassification.from_pretrained(MODEL_NAME)
+                    self._model = torch.ao.quantization.quantize_dynamic(
+                        model.eval(), {torch.nn.Linear}, dtype=torch.qint8
+                    )
+
+            label2id = {
+                label.lower(): int(i) for i, label in self._model.config.id2label.items()
+            }
+            self._label_columns = [label2id[label] for label in self.LABELS]
             logger.info("FinBERT model loaded successfully.")
         except Exception as e:
             logger.error(f"Failed to load FinBERT model: {e}")
             raise
 
-    def analyze_sentiment(self, texts: List[str]) -> List[Dict]:
+    def _load_onnx_model(self):
+        """
+        以 ONNX Runtime (CPU) 載入 FinBERT
+
+        首次執行時由 PyTorch 權重匯出 ONNX 並存至 ONNX_MODEL_DIR；
+        若已執行 quantize_finbert.py，則載入 int8 量化模型
+
+        Returns:
+            ORTModelForSequenceClassification，若未安裝 optimum 則返回 None
+        """
+        try:
+            from optimum.onnxruntime import ORTModelForSequenceClassification
+        except ImportError:
+            logger.info("optimum[onnxruntime] not installed, using PyTorch backend.")
+            return None
+
+        import onnxruntime
+
+        session_options = onnxruntime.SessionOptions()
+        session_options.intra_op_num_threads = ORT_NUM_THREADS
+
+        # 優先使用 quantize_finbert.py 產生的 int8 量化模型
+        for file_name in (ONNX_QUANTIZED_FILE, "model.onnx"):
+            if (ONNX_MODEL_DIR / file_name).exists():
+                logger.info(f"Loading FinBERT ONNX model: {file_name}")
+                return ORTModelForSequenceClassification.from_pretrained(
+                    ONNX_MODEL_DIR,
+                    file_name=file_name,
+                    provider="CPUExecutionProvider",
+                    session_options=session_options,
+                )
+
+        logger.info("Exporting FinBERT to ONNX...")
+        model = ORTModelForSequenceClassification.from_pretrained(
+            MODEL_NAME,
+            export=True,
+            provider="CPUExecutionProvider",
+            session_options=session_options,
+        )
+        model.save_pretrained(ONNX_MODEL_DIR)
+        return model
+
+    def analyze_sentiment(self, texts: List[str]) -> np.ndarray:
         """
         分析文本列表的情緒
+
+        每 BATCH_SIZE 則標題只斷詞一次並進行一次前向運算
         
         Args:
             texts: 新聞標題列表
             
         Returns:
-            List[Dict]: 每個文本的情緒分數 {'positive': 0.9, 'negative': 0.1, 'neutral': 0.0}
+            np.ndarray: 形狀 (N, 3) 的機率矩陣，欄位依序為 (negative, neutral, positive)，
+            可用 FinBertService.NEG / NEU / POS 索引
         """
         if not texts:
-            return []
+            return np.empty((0, len(self.LABELS)))
             
         try:
-            # 批次處理
-            results = self._pipeline(texts)
-            
-            # 格式化輸出
-            formatted_results = []
-            for res in results:
-                # res 是一個 list of dicts [{'label': 'positive', 'score': 0.9}, ...]
-                scores = {item['label']: item['score'] for item in res}
-                formatted_results.append(scores)
-                
-            return formatted_results
+            import torch
+
+            # GPU 上以 FP16 autocast 執行，CPU 不需要
+            autocast = (
+                torch.autocast("cuda", dtype=torch.float16)
+                if self._device == "cuda" else contextlib.nullcontext()
+            )
+
+            batches = []
+            with torch.inference_mode(), autocast:
+                for start in range(0, len(texts), self.BATCH_SIZE):
+                    encoded = self._tokenizer(
+                        texts[start:start + self.BATCH_SIZE],
+                        truncation=True,
+                        padding="longest",
+                        max_length=self.MAX_LENGTH,
+                        return_tensors="pt",
+                    ).to(self._device)
+                    logits = self._model(**encoded).logits[:, self._label_columns]
+                    probs = torch.softmax(logits.float(), dim=-1)
+                    batches.append(probs.cpu().numpy())
+
+            return np.concatenate(batches)
         except Exception as e:
             logger.error(f"Sentiment analysis failed: {e}")
-            return []
+            return np.empty((0, len(self.LABELS)))
 
-# 單例模式存取點
-def get_finbert_service():
+# 單例模式存取點：快取服務實例，之後的呼叫不再經過 __new__ 的檢查
+# （載入失敗時拋出例外不會被快取，下次呼叫可重試）
+@functools.cache
+def get_finbert_service() -> FinBertService:
     return FinBertService()
@@ -1,108 +1,69 @@
-import yfinance as yf
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Union
+
 from api.models import Signal, SignalType, AnalysisSource
+from services.prediction.signals import classify_signal, signal_edges
+from services.prediction.ticker_cache import DataProviderError, get_info_fields
 
-class FundamentalAnalyzer:
-    def analyze(self, symbol: str) -> Signal:
-        try:
-            ticker = yf.Ticker(symbol)
-            # info 屬性會觸發 API 請求
-            info = ticker.info
-            
-            # 簡單的價值投資規則 (Graham-like) + 獲利能力 + 財務健康
-            # 注意：有些股票可能沒有這些欄位，需做防呆
-            pe_ratio = info.get('trailingPE')
-            pb_ratio = info.get('priceToBook')
-            roe = info.get('returnOnEquity')
-            profit_margins = info.get('profitMargins')
-            debt_to_equity = info.get('debtToEquity')
-            current_ratio = info.get('currentRatio')
-            
-            score = 0.0
-            reasons = []
-            
-            # 1. PE 評分 (權重調整)
-            if pe_ratio is not None:
-                if 0 < pe_ratio < 15:
-                    score += 0.3
-                    reasons.append(f"低本益比 ({pe_ratio:.2f})")
-                elif 15 <= pe_ratio <= 25:
-                    score += 0.1
-                    reasons.append(f"合理本益比 ({pe_ratio:.2f})")
-                elif pe_ratio > 40: # 科技股容忍度較高
-                    score -= 0.2
-                    reasons.append(f"高本益比 ({pe_ratio:.2f})")
-            
-            # 2. PB 評分
-            if pb_ratio is not None:
-                if 0 < pb_ratio < 1.5:
-                    score += 0.2
-                    reasons.append(f"低股價淨值比 ({pb_ratio:.2f})")
-                elif pb_ratio > 10: # 科技股 PB 通常較高
-                    score -= 0.1
-                    reasons.append(f"高股價淨值比 ({pb_ratio:.2f})")
-                
-            # 3. ROE 評分 (獲利能力核心)
-            if roe is not None:
-                if roe > 0.20: # 提高標準
-                    score += 0.3
-                    reasons.append(f"極佳 ROE ({roe:.2%})")
-                elif roe > 0.15:
-                    score += 0.15
-                    reasons.append(f"優良 ROE ({roe:.2%})")
-                elif roe < 0:
-                    score -= 0.3
-                    reasons.append(f"負 ROE ({roe:.2%})")
+logger = logging.getLogger(__name__)
 
-            # 4. 淨利率 (Profit Margins)
-            if profit_margins is not None:
-                if profit_margins > 0.20:
-                    score += 0.2
-                    reasons.append(f"高淨利率 ({profit_margins:.2%})")
-                elif profit_margins < 0.05:
-                    score -= 0.1
-                    reasons.append(f"低淨利率 ({profit_margins:.2%})")
+# 簡單的價值投資規則 (Graham-like) + 獲利能力 + 財務健康
+# 格式：(info 欄位, ((條件, 分數增減, 理由模板), ...))
+RULES = (
+    # 1. PE 評分 (權重調整)，科技股容忍度較高
+    ('trailingPE', (
+        (lambda v: 0 < v < 15, 0.3, "低本益比 ({:.2f})"),
+        (lambda v: 15 <= v <= 25, 0.1, "合理本益比 ({:.2f})"),
+        (lambda v: v > 40, -0.2, "高本益比 ({:.2f})"),
+    )),
+    # 2. PB 評分，科技股 PB 通常較高
+    ('priceToBook', (
+        (lambda v: 0 < v < 1.5, 0.2, "低股價淨值比 ({:.2f})"),
+        (lambda v: v > 10, -0.1, "高股價淨值比 ({:.2f})"),
+    )),
+    # 3. ROE 評分 (獲利能力核心)
+    ('returnOnEquity', (
+        (lambda v: v > 0.20, 0.3, "極佳 ROE ({:.2%})"),
+        (lambda v: v > 0.15, 0.15, "優良 ROE ({:.2%})"),
+        (lambda v: v < 0, -0.3, "負 ROE ({:.2%})"),
+    )),
+    # 4. 淨利率 (Profit Margins)
+    ('profitMargins', (
+        (lambda v: v > 0.20, 0.2, "高淨利率 ({:.2%})"),
+        (lambda v: v < 0.05, -0.1, "低淨利率 ({:.2%})"),
+    )),
+    # 5. 負債比 (Debt to Equity)
+    ('debtToEquity', (
+        (lambda v: v < 50, 0.1, "低負債比 ({:.2f}%)"),
+        (lambda v: v > 200, -0.1, "高負債比 ({:.2f}%)"),
+    )),
+    # 6. 流動比 (Current Ratio) - 短期償債能力
+    ('currentRatio', (
+        (lambda v: v > 1.5, 0.1, "流動性佳 ({:.2f})"),
+        (lambda v: v < 1.0, -0.1, "流動性偏低 ({:.2f})"),
+    )),
+)
 
-            # 5. 負債比 (Debt to Equity)
-            if debt_to_equity is not None:
-                if debt_to_equity < 50:
-                    score += 0.1
-                    reasons.append(f"低負債比 ({debt_to_equity:.2f}%)")
-                elif debt_to_equity > 200:
-                    score -= 0.1
-                    reasons.append(f"高負債比 ({debt_to_equity:.2f}%)")
+# 評分所需的 info 欄位
+RULE_FIELDS = tuple(key for key, _ in RULES)
 
-            # 6. 流動比 (Current Ratio) - 短期償債能力
-            if current_ratio is not None:
-                if current_ratio > 1.5:
-                    score += 0.1
-                    reasons.append(f"流動性佳 ({current_ratio:.2f})")
-                elif current_ratio < 1.0:
-                    score -= 0.1
-                    reasons.append(f"流動性偏低 ({current_ratio:.2f})")
-            
-            # 限制分數範圍 -1.0 ~ 1.0
-            score = max(-1.0, min(1.0, score))
-            
-            # 決定訊號類型
-            if score >= 0.25:
-                signal_type = SignalType.BULLISH
-            elif score <= -0.25:
-                signal_type = SignalType.BEARISH
-            else:
-                signal_type = SignalType.NEUTRAL
-                
-            reason_str = " | ".join(reasons) if reasons else "基本面數據平平或缺乏數據"
-            
-            return Signal(
-                source=AnalysisSource.FUNDAMENTAL,
-                signal_type=signal_type,
-                score=round(score, 2),
-                confidence=0.8, # 財報數據相對可靠
-                reason=reason_str
-            )
+# 看多 / 看空門檻 ±0.25
+SIGNAL_EDGES = signal_edges(0.25)
+
+class FundamentalAnalyzer:
+    # 批次分析時同時抓取 info 的執行緒數
+    MAX_WORKERS = 8
+
+    def analyze(self, symbol: str) -> Signal:
+        try:
+            # info 會觸發 API 請求，只取評分所需欄位並快取於 ticker_cache
+            info = get_info_fields(symbol, RULE_FIELDS)
+            return self._score_from_info(info)
             
-        except Exception as e:
-            # Log error properly in production
+        except (DataProviderError, KeyError, ValueError) as e:
+            # 資料來源或資料格式問題：降級為中性訊號；其他例外交由 orchestrator 處理
+            logger.warning("%s 基本面分析失敗: %s", symbol, e)
             return Signal(
                 source=AnalysisSource.FUNDAMENTAL,
                 signal_type=SignalType.NEUTRAL,
@@ -110,3 +71,74 @@ class FundamentalAnalyzer:
                 confidence=0.0,
                 reason=f"基本面分析失敗: {str(e)}"
             )
+
+    def analyze_many(
+        self, symbols: List[str], timeout: Optional[float] = None
+    ) -> Dict[str, Union[Signal, Exception]]:
+        """
+        批次分析多檔股票
+
+        以執行緒池同時抓取各股票的 info，網路等待時間互相重疊；
+        各股票的結果分開收集，單一股票失敗不影響其他股票
+
+        Args:
+            symbols: 股票代碼列表
+            timeout: 整批等待上限（秒），逾時仍未完成的股票以 TimeoutError 表示
+
+        Returns:
+            {股票代碼: 基本面訊號，或分析時拋出的例外（含 TimeoutError）}
+        """
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return {}
+
+        executor = ThreadPoolExecutor(max_workers=min(self.MAX_WORKERS, len(symbols)))
+        futures = {symbol: executor.submit(self.analyze, symbol) for symbol in symbols}
+        done, _ = wait(futures.values(), timeout=timeout)
+        # 逾時後不再等待（執行中的請求會在背景完成並寫入資料快取），尚未開始的直接取消
+        executor.shutdown(wait=False, cancel_futures=True)
+
+        results = {}
+        for symbol, future in futures.items():
+            if future not in done:
+                results[symbol] = TimeoutError(f"{symbol} 基本面分析超時")
+            elif future.exception() is not None:
+                results[symbol] = future.exception()
+            else:
+                results[symbol] = future.result()
+        return results
+
+    def _score_from_info(self, info: Dict) -> Signal:
+        """依規則表將 info 欄位轉為基本面訊號"""
+        # 依規則表逐欄評分，每個欄位只採用第一個符合的條件
+        # 注意：有些股票可能沒有這些欄位，需做防呆
+        # 先收集符合的規則，分數與理由文字各在最後一次計算
+        matched = []
+        for key, cases in RULES:
+            value = info.get(key)
+            if value is None:
+                continue
+            for predicate, delta, template in cases:
+                if predicate(value):
+                    matched.append((delta, template, value))
+                    break
+        
+        # 限制分數範圍 -1.0 ~ 1.0
+        score = max(-1.0, min(1.0, sum(delta for delta, _, _ in matched)))
+        
+        # 決定訊號類型
+        signal_type = classify_signal(score, SIGNAL_EDGES)
+            
+        reason_str = (
+            " | ".join(template.format(value) for _, template, value in matched)
+            or "基本面數據平平或缺乏數據"
+        )
+        
+        # 分數已限制在 -1.0 ~ 1.0，略過 Pydantic 驗證
+        return Signal.model_construct(
+            source=AnalysisSource.FUNDAMENTAL,
+            signal_type=signal_type,
+            score=round(score, 2),
+            confidence=0.8, # 財報數據相對可靠
+            reason=reason_str
+        )
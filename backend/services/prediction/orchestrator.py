@@ -1,43 +1,183 @@
+import asyncio
+import logging
 from datetime import datetime
-from typing import List
-from api.models import PredictionResult, Signal, SignalType
+from typing import Callable, Dict, List
+
+import numpy as np
+from cachetools import TTLCache
+
+from api.models import PredictionResult, Signal, SignalType, AnalysisSource
 from services.prediction.fundamental import FundamentalAnalyzer
 from services.prediction.sentiment import SentimentAnalyzer
+from services.prediction.signals import classify_signal, signal_edges
+
+logger = logging.getLogger(__name__)
+
+# 預測結果快取時間（秒）；有分析器逾時或失敗的結果不寫入快取
+PREDICTION_CACHE_TTL = 60
+
+# 各訊號權重，依序對應 [基本面, 消息面]
+# 策略：基本面為主 (60%)，消息面為輔 (40%)
+SIGNAL_WEIGHTS = np.array([0.6, 0.4])
+
+# 看多 / 看空門檻（±），可根據回測結果調整
+SIGNAL_THRESHOLD = 0.25
+SIGNAL_EDGES = signal_edges(SIGNAL_THRESHOLD)
+
+# 各分析器等待上限（秒），yfinance 偶爾單次請求長達數十秒
+FUNDAMENTAL_TIMEOUT = 5.0
+SENTIMENT_TIMEOUT = 6.0
+
+
+async def _run_analyzer(analyze: Callable[[str], Signal], symbol: str, timeout: float):
+    """
+    在執行緒中執行分析器並限制等待時間
+
+    逾時後不再等待（執行緒無法中止，會在背景完成並寫入資料快取）
+
+    Returns:
+        分析訊號，或執行期間拋出的例外（含 TimeoutError）
+    """
+    try:
+        return await asyncio.wait_for(asyncio.to_thread(analyze, symbol), timeout)
+    except Exception as e:
+        return e
+
+
+def _failed_signal(source: AnalysisSource, name: str, error: BaseException) -> Signal:
+    """將分析任務的例外（或逾時）轉為中性訊號"""
+    if isinstance(error, TimeoutError):
+        logger.warning("%s分析超時", name)
+        reason = f"{name}分析超時"
+    else:
+        logger.debug("%s分析任務失敗", name, exc_info=error)
+        reason = f"{name}分析失敗: {str(error)}"
+    return Signal(
+        source=source,
+        signal_type=SignalType.NEUTRAL,
+        score=0.0,
+        confidence=0.0,
+        reason=reason
+    )
+
 
 class PredictionOrchestrator:
     def __init__(self):
         self.fundamental = FundamentalAnalyzer()
         self.sentiment = SentimentAnalyzer()
+        self._cache = TTLCache(maxsize=512, ttl=PREDICTION_CACHE_TTL)
+        self._inflight: Dict[str, asyncio.Task] = {}
         
     async def predict(self, symbol: str) -> PredictionResult:
         """
         執行綜合預測分析
+
+        TTL 內重複查詢直接返回快取結果；同一股票的並行請求共用同一個計算任務。
+        以下檢查與登記之間沒有 await，在單一事件迴圈中不需另外加鎖
         """
+        cached = self._cache.get(symbol)
+        if cached is not None:
+            return cached
+
+        task = self._inflight.get(symbol)
+        if task is None:
+            task = asyncio.create_task(self._predict(symbol))
+            self._inflight[symbol] = task
+            task.add_done_callback(lambda t: self._on_predict_done(symbol, t))
+
+        # shield：單一請求被取消時不影響其他等待同一任務的請求
+        return await asyncio.shield(task)
+
+    def _on_predict_done(self, symbol: str, task: asyncio.Task) -> None:
+        """計算任務完成：移除進行中紀錄（快取由 _finish 寫入）"""
+        self._inflight.pop(symbol, None)
+
+    async def _predict(self, symbol: str) -> PredictionResult:
+        """實際執行各項分析並加權聚合"""
         # 1. 執行各項分析
-        # TODO: Phase 2 改為 asyncio.gather 並行執行以提升效能
-        fund_signal = self.fundamental.analyze(symbol)
-        sent_signal = self.sentiment.analyze(symbol)
+        # 兩者皆為阻塞的網路請求，丟到執行緒並行執行，各自設定逾時；
+        # _run_analyzer 不拋出例外，單一任務失敗或逾時不會取消另一個
+        async with asyncio.TaskGroup() as tg:
+            fund_task = tg.create_task(
+                _run_analyzer(self.fundamental.analyze, symbol, FUNDAMENTAL_TIMEOUT)
+            )
+            sent_task = tg.create_task(
+                _run_analyzer(self.sentiment.analyze, symbol, SENTIMENT_TIMEOUT)
+            )
+        return self._finish(symbol, fund_task.result(), sent_task.result())
+
+    async def predict_many(self, symbols: List[str]) -> Dict[str, PredictionResult]:
+        """
+        批次執行多檔股票的綜合預測分析
+
+        基本面以 analyze_many 一次並行抓取，消息面逐檔並行，兩者皆有逾時限制；
+        單一股票失敗或逾時只影響該股票。TTL 內已快取的股票直接沿用
+
+        Args:
+            symbols: 股票代碼列表
+
+        Returns:
+            {股票代碼: 預測結果}，順序與輸入相同
+        """
+        results = {}
+        missing = []
+        for symbol in dict.fromkeys(symbols):
+            cached = self._cache.get(symbol)
+            if cached is not None:
+                results[symbol] = cached
+            else:
+                missing.append(symbol)
+
+        if missing:
+            fund_signals, *sent_signals = await asyncio.gather(
+                asyncio.to_thread(self.fundamental.analyze_many, missing, FUNDAMENTAL_TIMEOUT),
+                *(_run_analyzer(self.sentiment.analyze, s, SENTIMENT_TIMEOUT) for s in missing),
+                return_exceptions=True
+            )
+            for symbol, sent_signal in zip(missing, sent_signals):
+                fund_signal = (
+                    fund_signals if isinstance(fund_signals, BaseException)
+                    else fund_signals[symbol]
+                )
+                results[symbol] = self._finish(symbol, fund_signal, sent_signal)
+
+        return {symbol: results[symbol] for symbol in dict.fromkeys(symbols)}
+
+    def _finish(self, symbol: str, fund_signal, sent_signal) -> PredictionResult:
+        """
+        聚合訊號並寫入快取
+
+        任一分析器逾時或失敗（結果為例外）時不快取，下次查詢即重新分析，
+        避免暫時性的中性結果被沿用整個 TTL
+        """
+        result = self._aggregate(symbol, fund_signal, sent_signal)
+        if not any(isinstance(s, BaseException) for s in (fund_signal, sent_signal)):
+            self._cache[symbol] = result
+        return result
+
+    def _aggregate(self, symbol: str, fund_signal, sent_signal) -> PredictionResult:
+        """
+        將基本面與消息面訊號加權聚合為預測結果
+
+        Args:
+            symbol: 股票代碼
+            fund_signal: 基本面訊號，或分析任務拋出的例外
+            sent_signal: 消息面訊號，或分析任務拋出的例外
+        """
+        if isinstance(fund_signal, BaseException):
+            fund_signal = _failed_signal(AnalysisSource.FUNDAMENTAL, "基本面", fund_signal)
+        if isinstance(sent_signal, BaseException):
+            sent_signal = _failed_signal(AnalysisSource.SENTIMENT, "消息面", sent_signal)
         
         signals = [fund_signal, sent_signal]
         
-        # 2. 加權聚合 (Weighted Aggregation)
-        # 策略：基本面為主 (60%)，消息面為輔 (40%)
-        w_fund = 0.6
-        w_sent = 0.4
-        
-        weighted_score = (fund_signal.score * w_fund) + (sent_signal.score * w_sent)
-        
-        # 確保分數在 -1.0 到 1.0 之間
-        weighted_score = max(-1.0, min(1.0, weighted_score))
+        # 2. 加權聚合 (Weighted Aggregation)，並確保分數在 -1.0 到 1.0 之間
+        scores = np.array([signal.score for signal in signals])
+        # 逐項相乘再加總（不用 @：BLAS 的 FMA 會讓門檻邊界上的分數差 1 ulp）
+        weighted_score = float(np.clip((scores * SIGNAL_WEIGHTS).sum(), -1.0, 1.0))
         
         # 3. 決定總體訊號
-        # 門檻值可根據回測結果調整
-        if weighted_score >= 0.25:
-            overall_signal = SignalType.BULLISH
-        elif weighted_score <= -0.25:
-            overall_signal = SignalType.BEARISH
-        else:
-            overall_signal = SignalType.NEUTRAL
+        overall_signal = classify_signal(weighted_score, SIGNAL_EDGES)
             
         return PredictionResult(
             symbol=symbol,
@@ -1,13 +1,101 @@
+import logging
+import math
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from cachetools import LRUCache
+
 from api.models import Signal, SignalType, AnalysisSource, NewsItem
-import yfinance as yf
-from services.prediction.finbert_service import get_finbert_service
+from services.prediction.finbert_service import FinBertService, get_finbert_service
+from services.prediction.signals import classify_signal, signal_edges
+from services.prediction.ticker_cache import DataProviderError, get_news
+
+logger = logging.getLogger(__name__)
+
+# 每次分析的新聞則數
+MAX_NEWS_TO_ANALYZE = 5
+
+# 送入 FinBERT 前的標題字元上限（遠超過 MAX_LENGTH 個 token 所需）
+MAX_TITLE_CHARS = 256
+
+# 少於此字元數的標題視為無效（空字串或殘缺資料）
+MIN_TITLE_CHARS = 5
+
+# 標題 → 情緒分數快取
+_score_cache = LRUCache(maxsize=2048)
+_score_cache_lock = threading.Lock()
+
+# 訊號門檻 ±0.15：降低門檻，因為平均值通常較低
+SIGNAL_EDGES = signal_edges(0.15)
+
+# 單則新聞標籤（依分數由低到高）與 searchsorted(side="right") 邊界：
+# < -0.2 利空、> 0.2 利多（兩端皆不含等號）
+ITEM_LABELS = np.array(("利空", "中性", "利多"))
+ITEM_LABEL_EDGES = np.array((-0.2, math.nextafter(0.2, math.inf)))
+
+
+def _extract_title_url(item: Dict) -> Tuple[str, str]:
+    """
+    從 yfinance 新聞項目取出標題與連結
+
+    新版 yfinance 將資料放在 'content' 內（連結在 clickThroughUrl），
+    舊版則是扁平結構（title / link），兩者都需處理
+
+    Args:
+        item: yfinance news 列表中的一個項目
+
+    Returns:
+        (title, url)，缺少時分別為 '' 與 '#'
+    """
+    content = item.get('content')
+    if isinstance(content, dict) and 'title' in content:
+        url_obj = content.get('clickThroughUrl')
+        return content.get('title') or '', (url_obj.get('url') if url_obj else None) or '#'
+    return item.get('title') or '', item.get('link') or '#'
+
+
+def _score_titles(clean_titles: List[str]) -> List[Optional[float]]:
+    """
+    計算各則標題的情緒分數，已分析過的標題直接取用快取
+
+    同一則總經新聞常同時出現在多檔股票，快取可避免重複呼叫 FinBERT；
+    全部命中快取時不會載入模型
+
+    Args:
+        clean_titles: 已清理的標題列表
+
+    Returns:
+        分數列表 (P(positive) - P(negative))，FinBERT 分析失敗的標題為 None
+    """
+    with _score_cache_lock:
+        scores = [_score_cache.get(title) for title in clean_titles]
+
+    missing = list(dict.fromkeys(t for t, s in zip(clean_titles, scores) if s is None))
+    if not missing:
+        return scores
+
+    probs = get_finbert_service().analyze_sentiment(missing)
+    if len(probs) != len(missing):
+        # 分析失敗時返回空矩陣，不寫入快取
+        return scores
+
+    # FinBERT 輸出: positive, negative, neutral 機率
+    # 轉換為 -1 到 1 的分數: Score = P(positive) - P(negative)
+    new_scores = dict(zip(
+        missing, (probs[:, FinBertService.POS] - probs[:, FinBertService.NEG]).tolist()
+    ))
+    with _score_cache_lock:
+        _score_cache.update(new_scores)
+
+    return [new_scores[t] if s is None else s for t, s in zip(clean_titles, scores)]
+
 
 class SentimentAnalyzer:
     def analyze(self, symbol: str) -> Signal:
         try:
-            ticker = yf.Ticker(symbol)
-            # yfinance 的 news 屬性通常返回最近的新聞列表
-            news = ticker.news
+            # yfinance 的 news 屬性通常返回最近的新聞列表（已快取於 ticker_cache）
+            news = get_news(symbol)
             
             if not news:
                 return Signal(
@@ -19,87 +107,73 @@ class SentimentAnalyzer:
                 )
             
             # Phase 2: FinBERT 分析
-            max_news_to_analyze = 5
-            news_items = news[:max_news_to_analyze]
-            
-            # yfinance news structure changed. It seems to be nested in 'content' now.
-            # Or sometimes it's flat. We need to handle both.
-            titles = []
-            urls = []
+            titles, urls = map(list, zip(*map(_extract_title_url, news[:MAX_NEWS_TO_ANALYZE])))
             
-            for item in news_items:
-                # Try to get title from 'content' dict if it exists, otherwise from item directly
-                content = item.get('content', {})
-                if isinstance(content, dict) and 'title' in content:
-                    title = content.get('title', '')
-                    # Try to find url in clickThroughUrl
-                    url_obj = content.get('clickThroughUrl')
-                    url = url_obj.get('url') if url_obj else '#'
-                else:
-                    title = item.get('title', '')
-                    url = item.get('link', '#')
-                
-                titles.append(title)
-                urls.append(url)
+            # 先去除空白並截斷過長字串，斷詞時不必處理整段超長文字
+            # （FinBERT 為 uncased 模型，轉小寫由 tokenizer 處理）
+            # 過短或空白的標題（常見於異常的 yfinance 資料）不送入模型
+            valid = [
+                (title, url, clean)
+                for title, url in zip(titles, urls)
+                if len(clean := title.strip()[:MAX_TITLE_CHARS]) >= MIN_TITLE_CHARS
+            ]
+            if not valid:
+                return Signal(
+                    source=AnalysisSource.SENTIMENT,
+                    signal_type=SignalType.NEUTRAL,
+                    score=0.0,
+                    confidence=0.0,
+                    reason="無有效新聞標題"
+                )
             
-            # 取得 FinBERT 服務實例並分析
-            finbert = get_finbert_service()
-            sentiment_scores = finbert.analyze_sentiment(titles)
+            # 分析失敗而沒有分數的標題直接略過
+            scored = [
+                (title, url, score)
+                for (title, url, _), score in zip(valid, _score_titles([v[2] for v in valid]))
+                if score is not None
+            ]
+            titles = [title for title, _, _ in scored]
+            urls = [url for _, url, _ in scored]
+            item_scores = np.array([score for _, _, score in scored], dtype=np.float64)
             
-            total_score = 0.0
-            evidence = []
-            news_items_data = []
+            # 各則新聞標籤：> 0.2 利多、< -0.2 利空，其餘中性
+            label_index = np.searchsorted(ITEM_LABEL_EDGES, item_scores, side="right")
+            labels = ITEM_LABELS[label_index].tolist()
+            rounded_scores = np.round(item_scores, 2).tolist()
             
-            for i, scores in enumerate(sentiment_scores):
-                # FinBERT 輸出: positive, negative, neutral
-                # 轉換為 -1 到 1 的分數
-                # Score = P(positive) - P(negative)
-                item_score = scores.get('positive', 0) - scores.get('negative', 0)
-                total_score += item_score
-                
-                # Determine label for this specific news item
-                if item_score > 0.2:
-                    label = "利多"
-                elif item_score < -0.2:
-                    label = "利空"
-                else:
-                    label = "中性"
-
-                news_items_data.append(NewsItem(
-                    title=titles[i],
-                    url=urls[i],
+            # 欄位皆由本模組產生，略過 Pydantic 驗證
+            news_items_data = [
+                NewsItem.model_construct(
+                    title=title,
+                    url=url,
                     sentiment_label=label,
-                    sentiment_score=round(item_score, 2)
-                ))
-                
-                # 收集顯著證據 (絕對值 > 0.5)
-                if abs(item_score) > 0.5:
-                    sentiment_label = "利多" if item_score > 0 else "利空"
-                    # 截斷標題以保持簡潔
-                    short_title = titles[i][:30] + "..." if len(titles[i]) > 30 else titles[i]
-                    evidence.append(f"{sentiment_label}: {short_title} ({item_score:.2f})")
+                    sentiment_score=score
+                )
+                for title, url, label, score in zip(titles, urls, labels, rounded_scores)
+            ]
             
-            # 計算平均分數
-            avg_score = total_score / len(sentiment_scores) if sentiment_scores else 0.0
+            # 收集顯著證據 (絕對值 > 0.5)
+            evidence = []
+            for i in np.flatnonzero(np.abs(item_scores) > 0.5):
+                item_score = float(item_scores[i])
+                sentiment_label = "利多" if item_score > 0 else "利空"
+                # 截斷標題以保持簡潔
+                short_title = titles[i][:30] + "..." if len(titles[i]) > 30 else titles[i]
+                evidence.append(f"{sentiment_label}: {short_title} ({item_score:.2f})")
             
-            # 限制分數範圍
-            avg_score = max(-1.0, min(1.0, avg_score))
+            # 計算平均分數並限制範圍
+            avg_score = float(np.clip(item_scores.mean(), -1.0, 1.0)) if item_scores.size else 0.0
             
             # 決定訊號
-            if avg_score >= 0.15: # 降低門檻，因為平均值通常較低
-                signal_type = SignalType.BULLISH
-            elif avg_score <= -0.15:
-                signal_type = SignalType.BEARISH
-            else:
-                signal_type = SignalType.NEUTRAL
+            signal_type = classify_signal(avg_score, SIGNAL_EDGES)
             
-            reason_str = f"FinBERT 分析 {len(sentiment_scores)} 則新聞"
+            reason_str = f"FinBERT 分析 {len(item_scores)} 則新聞"
             if evidence:
                 reason_str += ": " + " | ".join(evidence[:2]) # 只顯示前 2 個最強證據
             else:
                 reason_str += " (情緒中性)"
 
-            return Signal(
+            return Signal.model_construct(
                 source=AnalysisSource.SENTIMENT,
                 signal_type=signal_type,
                 score=round(avg_score, 2),
@@ -108,7 +182,9 @@ class SentimentAnalyzer:
                 news_items=news_items_data
             )
             
-        except Exception as e:
+        except (DataProviderError, KeyError, ValueError) as e:
+            # 資料來源或資料格式問題：降級為中性訊號；其他例外交由 orchestrator 處理
+            logger.warning("%s 消息面分析失敗: %s", symbol, e)
             return Signal(
                 source=AnalysisSource.SENTIMENT,
                 signal_type=SignalType.NEUTRAL,
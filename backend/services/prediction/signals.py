@@ -0,0 +1,43 @@
+"""
+分數 → 訊號類型分類
+
+各分析器以 ± 門檻將 -1.0 ~ 1.0 的分數分為看空 / 中性 / 看多，
+門檻預先轉為有序的邊界，分類時以 bisect 查表而不需逐一比較。
+"""
+import math
+from bisect import bisect_right
+from typing import Tuple
+
+from api.models import SignalType
+
+# 依分數由低到高排列的訊號類型
+SIGNAL_TYPES = (SignalType.BEARISH, SignalType.NEUTRAL, SignalType.BULLISH)
+
+
+def signal_edges(threshold: float) -> Tuple[float, float]:
+    """
+    將門檻轉為 bisect_right 的分類邊界
+
+    score <= -threshold 為看空、score >= threshold 為看多（兩端皆含等號）
+
+    Args:
+        threshold: 看多 / 看空門檻（正數）
+
+    Returns:
+        (看空上界的下一個浮點數, 看多下界)
+    """
+    return (math.nextafter(-threshold, math.inf), threshold)
+
+
+def classify_signal(score: float, edges: Tuple[float, float]) -> SignalType:
+    """
+    依分類邊界決定訊號類型
+
+    Args:
+        score: 分數
+        edges: signal_edges() 產生的邊界
+
+    Returns:
+        SignalType
+    """
+    return SIGNAL_TYPES[bisect_right(edges, score)]
@@ -0,0 +1,198 @@
+"""
+yfinance Ticker 共用快取
+
+基本面與消息面分析共用同一個 Ticker 物件，
+並以 TTL 快取 info 所需欄位 / news，短時間內重複預測同一檔股票時不再發出網路請求。
+
+網路請求遇到流量限制時以指數退避重試；連續失敗時由斷路器暫停請求，
+yfinance 無法使用期間直接失敗而不必等待網路逾時。
+
+連線重用由 yfinance 負責：所有 Ticker 共用 yfinance 內部單一的 curl_cffi Session
+（模擬 Chrome，支援 HTTP/2 與 keep-alive），因此這裡不另外傳入 session；
+yfinance 也不接受 requests_cache 等快取型 session。
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+from cachetools import TTLCache, cached
+from cachetools.keys import hashkey
+
+logger = logging.getLogger(__name__)
+
+# info / news 分開快取：財報欄位變動慢，新聞較常更新（秒）
+INFO_CACHE_TTL = 3600
+NEWS_CACHE_TTL = 300
+
+# yf.Ticker 會把抓過的 info / news 保存在物件上且不會過期，
+# 因此 Ticker 物件本身也只保留最短的資料快取時間，過期後重新建立
+TICKER_CACHE_TTL = min(INFO_CACHE_TTL, NEWS_CACHE_TTL)
+
+# 流量限制時的重試次數與退避上限（秒）
+RETRY_ATTEMPTS = 3
+RETRY_BACKOFF_MAX = 30
+
+_ticker_cache = TTLCache(maxsize=512, ttl=TICKER_CACHE_TTL)
+_info_cache = TTLCache(maxsize=512, ttl=INFO_CACHE_TTL)
+_news_cache = TTLCache(maxsize=512, ttl=NEWS_CACHE_TTL)
+
+
+class DataProviderError(Exception):
+    """yfinance 資料抓取失敗（網路錯誤、逾時、流量限制）"""
+
+
+class CircuitOpenError(DataProviderError):
+    """斷路器開啟中，暫停對 yfinance 發出請求"""
+
+
+class CircuitBreaker:
+    """
+    簡易斷路器
+
+    連續 fail_max 次 DataProviderError 後開啟，reset_timeout 秒內的呼叫直接失敗；
+    之後只放行一次試探，試探進行中的其他呼叫仍直接失敗；
+    試探成功即關閉，失敗則再次開啟
+    """
+
+    def __init__(self, name: str, fail_max: int = 5, reset_timeout: float = 60.0):
+        self.name = name
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def call(self, func: Callable, *args):
+        with self._lock:
+            if self._probing:
+                raise CircuitOpenError(f"{self.name} 試探請求進行中")
+            probe = self._opened_at is not None
+            if probe:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    raise CircuitOpenError(f"{self.name} 暫停請求中")
+                # 半開：只放行這次呼叫
+                self._probing = True
+
+        try:
+            result = func(*args)
+        except BaseException as e:
+            with self._lock:
+                if probe:
+                    self._probing = False
+                if isinstance(e, DataProviderError):
+                    self._failures += 1
+                    # 試探失敗一次即再度開啟
+                    if probe or (
+                        self._failures >= self.fail_max and self._opened_at is None
+                    ):
+                        self._opened_at = time.monotonic()
+                        logger.warning(
+                            "%s 連續失敗 %d 次，暫停請求 %.0f 秒",
+                            self.name, self._failures, self.reset_timeout,
+                        )
+            raise
+
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+        return result
+
+
+_info_breaker = CircuitBreaker("yfinance info")
+_news_breaker = CircuitBreaker("yfinance news")
+
+
+def _fetch(name: str, symbol: str, func: Callable):
+    """
+    執行 yfinance 請求，流量限制時以指數退避重試
+
+    Args:
+        name: 請求名稱（記錄用）
+        symbol: 股票代碼（記錄用）
+        func: 實際發出請求的函式
+
+    Raises:
+        DataProviderError: 網路錯誤、逾時或重試後仍被限制流量
+    """
+    from yfinance.exceptions import YFException, YFRateLimitError
+
+    start = time.perf_counter()
+    for attempt in range(1, RETRY_ATTEMPTS + 1):
+        try:
+            return func()
+        except YFRateLimitError as e:
+            error = e
+            if attempt == RETRY_ATTEMPTS:
+                break
+            time.sleep(min(RETRY_BACKOFF_MAX, 2 ** (attempt - 1)))
+        except (YFException, OSError) as e:
+            # curl_cffi 的連線 / 逾時 / HTTP 錯誤皆為 OSError 子類別
+            error = e
+            break
+
+    elapsed = time.perf_counter() - start
+    logger.warning(
+        "%s %s 抓取失敗 (%d 次嘗試, %.2fs): %r", symbol, name, attempt, elapsed, error
+    )
+    raise DataProviderError(f"{name} 抓取失敗: {error}") from error
+
+
+@cached(_ticker_cache, key=hashkey, lock=threading.Lock())
+def get_ticker(symbol: str):
+    """
+    取得股票代碼對應的共用 yf.Ticker 物件
+
+    Args:
+        symbol: 股票代碼
+
+    Returns:
+        yf.Ticker 物件
+    """
+    import yfinance as yf
+
+    # 不指定 session：沿用 yfinance 共用的連線池
+    return yf.Ticker(symbol)
+
+
+@cached(_info_cache, key=hashkey, lock=threading.Lock())
+def get_info_fields(symbol: str, fields: Tuple[str, ...]) -> Dict:
+    """
+    取得股票 info 中的指定欄位（快取）
+
+    fast_info 不提供本益比、ROE 等財務比率，仍需抓取完整 info；
+    但只保留需要的欄位，避免在快取中存放數百個欄位的完整資料
+
+    Args:
+        symbol: 股票代碼
+        fields: 需要的 info 欄位名稱
+
+    Returns:
+        {欄位: 數值} 字典，缺少的欄位值為 None
+    """
+    ticker = get_ticker(symbol)
+    info = _info_breaker.call(_fetch, "info", symbol, ticker.get_info)
+    subset = {key: info.get(key) for key in fields}
+
+    missing = [key for key, value in subset.items() if value is None]
+    if missing:
+        logger.debug("%s info 缺少欄位: %s", symbol, ", ".join(missing))
+
+    return subset
+
+
+@cached(_news_cache, key=hashkey, lock=threading.Lock())
+def get_news(symbol: str) -> List[Dict]:
+    """
+    取得股票近期新聞（快取）
+
+    Args:
+        symbol: 股票代碼
+
+    Returns:
+        yfinance news 列表
+    """
+    ticker = get_ticker(symbol)
+    return _news_breaker.call(_fetch, "news", symbol, lambda: ticker.news)
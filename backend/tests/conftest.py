@@ -10,3 +10,13 @@ import os
 backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if backend_dir not in sys.path:
     sys.path.insert(0, backend_dir)
+
+import pytest
+
+
+@pytest.fixture(scope="session", autouse=True)
+def warm_up_jit_kernels():
+    """測試開始前先觸發 JIT 編譯（或載入快取），編譯時間不計入個別測試"""
+    from utils.calculations import _warm_up_kernels
+
+    _warm_up_kernels()
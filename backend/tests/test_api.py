@@ -123,11 +123,13 @@ class TestBacktest:
             index=dates,
         )
 
-    @patch("api.routes.get_stock_data")
+    @patch("api.routes.get_multiple_stocks_data")
     @patch("api.routes.get_stock_info")
     def test_backtest_lump_sum(self, mock_info, mock_data):
         """測試單筆投資回測"""
-        mock_data.return_value = self._create_mock_data()
+        mock_data.side_effect = lambda symbols, start, end: {
+            s: self._create_mock_data() for s in symbols
+        }
         mock_info.return_value = {"name": "Test Stock"}
 
         response = client.post(
@@ -155,11 +157,13 @@ class TestBacktest:
         assert "sharpe_ratio" in result
         assert "portfolio_history" in result
 
-    @patch("api.routes.get_stock_data")
+    @patch("api.routes.get_multiple_stocks_data")
     @patch("api.routes.get_stock_info")
     def test_backtest_dca(self, mock_info, mock_data):
         """測試定期定額回測"""
-        mock_data.return_value = self._create_mock_data()
+        mock_data.side_effect = lambda symbols, start, end: {
+            s: self._create_mock_data() for s in symbols
+        }
         mock_info.return_value = {"name": "Test Stock"}
 
         response = client.post(
@@ -178,11 +182,13 @@ class TestBacktest:
         assert len(data["results"]) == 1
         assert data["results"][0]["total_invested"] > 0
 
-    @patch("api.routes.get_stock_data")
+    @patch("api.routes.get_multiple_stocks_data")
     @patch("api.routes.get_stock_info")
     def test_backtest_multiple_stocks(self, mock_info, mock_data):
         """測試多股票回測"""
-        mock_data.return_value = self._create_mock_data()
+        mock_data.side_effect = lambda symbols, start, end: {
+            s: self._create_mock_data() for s in symbols
+        }
         mock_info.return_value = {"name": "Test Stock"}
 
         response = client.post(
@@ -205,6 +211,29 @@ class TestBacktest:
         assert "best_performer" in comparison
         assert "highest_return" in comparison
 
+    @patch("api.routes.get_multiple_stocks_data")
+    @patch("api.routes.get_stock_info")
+    def test_backtest_predefined_stock_name(self, mock_info, mock_data):
+        """測試預定義清單中的股票直接使用清單名稱"""
+        mock_data.side_effect = lambda symbols, start, end: {
+            s: self._create_mock_data() for s in symbols
+        }
+
+        response = client.post(
+            "/api/backtest",
+            json={
+                "stocks": ["2330.TW"],
+                "start_date": "2020-01-01",
+                "end_date": "2020-12-31",
+                "strategy": "lump_sum",
+                "investment": {"amount": 10000},
+            },
+        )
+
+        assert response.status_code == 200
+        assert response.json()["results"][0]["name"] == "台積電"
+        mock_info.assert_not_called()
+
     def test_backtest_invalid_date_range(self):
         """測試無效日期範圍"""
         response = client.post(
@@ -281,10 +310,10 @@ class TestBacktest:
 
         assert response.status_code == 422
 
-    @patch("api.routes.get_stock_data")
+    @patch("api.routes.get_multiple_stocks_data")
     def test_backtest_stock_not_found(self, mock_data):
         """測試股票資料找不到"""
-        mock_data.return_value = None
+        mock_data.return_value = {"INVALID_SYMBOL": None}
 
         response = client.post(
             "/api/backtest",
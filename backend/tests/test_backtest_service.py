@@ -11,6 +11,7 @@ from services.backtest_service import (
     compare_results,
     _empty_result,
 )
+from utils.calculations import _metrics_loop, _metrics_numpy
 
 
 def create_mock_price_data(
@@ -107,10 +108,10 @@ class TestBacktestLumpSum:
         data = create_mock_price_data(days=30)
         result = backtest_lump_sum(data, amount=10000)
 
-        assert len(result["portfolio_history"]) > 0
-        first_entry = result["portfolio_history"][0]
-        assert "date" in first_entry
-        assert "value" in first_entry
+        history = result["portfolio_history"]
+        assert len(history["dates"]) > 0
+        assert len(history["dates"]) == len(history["values"])
+        assert history["dates"][0] == "2020-01-01"
 
     def test_max_drawdown_calculation(self):
         """測試最大回撤計算"""
@@ -231,6 +232,19 @@ class TestCompareResults:
         comparison = compare_results(results)
         assert comparison["best_performer"] == "AAPL"
 
+    def test_compare_raw_backtest_results(self):
+        """測試直接比較回測函式輸出（含 portfolio_history）"""
+        up = create_mock_price_data(days=252, daily_return=0.002, volatility=0.01)
+        down = create_mock_price_data(days=252, daily_return=-0.002, volatility=0.01)
+        results = [
+            {"symbol": "UP", **backtest_lump_sum(up, amount=10000)},
+            {"symbol": "DOWN", **backtest_lump_sum(down, amount=10000)},
+        ]
+
+        comparison = compare_results(results)
+        assert comparison["best_performer"] == "UP"
+        assert comparison["highest_return"] == results[0]["total_return"]
+
 
 class TestIntegration:
     """整合測試"""
@@ -253,8 +267,8 @@ class TestIntegration:
         assert dca["final_value"] > 0
 
         # 驗證歷史紀錄
-        assert len(lump_sum["portfolio_history"]) > 0
-        assert len(dca["portfolio_history"]) > 0
+        assert len(lump_sum["portfolio_history"]["dates"]) > 0
+        assert len(dca["portfolio_history"]["dates"]) > 0
 
     def test_metrics_consistency(self):
         """測試指標計算的一致性"""
@@ -268,3 +282,16 @@ class TestIntegration:
         # 如果總報酬為負，最終價值應小於初始投資
         if result["total_return"] < 0:
             assert result["final_value"] < result["total_invested"]
+
+    def test_metrics_kernels_agree(self):
+        """測試編譯迴圈與 NumPy 實作的指標一致（含 NaN 與 DCA 前的 0 值）"""
+        rng = np.random.default_rng(0)
+        prices = 100 * np.cumprod(1 + rng.normal(0, 0.02, 300))
+        prices[[10, 50]] = np.nan
+        portfolio_values = prices * 3
+        portfolio_values[:20] = 0.0
+
+        loop = _metrics_loop(portfolio_values, prices, 50000.0, 420 / 365.25, 0.02)
+        vectorized = _metrics_numpy(portfolio_values, prices, 50000.0, 420 / 365.25, 0.02)
+
+        np.testing.assert_allclose(loop, vectorized, rtol=1e-9)
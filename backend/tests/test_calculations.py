@@ -11,23 +11,32 @@ from utils.calculations import (
     calculate_volatility,
     calculate_sharpe_ratio,
     calculate_total_return,
+    calculate_metrics,
+    calculate_metrics_batch,
+    calculate_daily_returns,
+    _as_array,
+    _max_drawdown_loop,
+    _mean_std_loop,
 )
 
 
 class TestCalculateCAGR:
     """年化報酬率 (CAGR) 計算測試"""
 
-    def test_positive_return(self):
-        """測試正報酬情況"""
+    @pytest.mark.parametrize("initial, final, years, expected, rel", [
         # 初始 10000，5年後變成 20000，CAGR 約 14.87%
-        result = calculate_cagr(initial_value=10000, final_value=20000, years=5)
-        assert pytest.approx(result, rel=0.01) == 0.1487
-
-    def test_negative_return(self):
-        """測試負報酬情況"""
+        (10000, 20000, 5, 0.1487, 0.01),
         # 初始 10000，3年後變成 8000，CAGR 約 -7.17%
-        result = calculate_cagr(initial_value=10000, final_value=8000, years=3)
-        assert pytest.approx(result, rel=0.01) == -0.0717
+        (10000, 8000, 3, -0.0717, 0.01),
+        # 初始 10000，1年後變成 11000，CAGR = 10%
+        (10000, 11000, 1, 0.10, 0.001),
+        # 初始 10000，1.5年後變成 12000（非整數年份）
+        (10000, 12000, 1.5, (12000 / 10000) ** (1 / 1.5) - 1, 0.001),
+    ])
+    def test_known_cagr(self, initial, final, years, expected, rel):
+        """測試正報酬、負報酬、一年與非整數年份"""
+        result = calculate_cagr(initial_value=initial, final_value=final, years=years)
+        assert pytest.approx(result, rel=rel) == expected
 
     def test_zero_years(self):
         """測試年數為零的邊界情況"""
@@ -35,19 +44,6 @@ class TestCalculateCAGR:
         result = calculate_cagr(initial_value=10000, final_value=12000, years=0)
         assert result == 0.0
 
-    def test_one_year(self):
-        """測試一年的情況"""
-        # 初始 10000，1年後變成 11000，CAGR = 10%
-        result = calculate_cagr(initial_value=10000, final_value=11000, years=1)
-        assert pytest.approx(result, rel=0.001) == 0.10
-
-    def test_fractional_years(self):
-        """測試非整數年份"""
-        # 初始 10000，1.5年後變成 12000
-        result = calculate_cagr(initial_value=10000, final_value=12000, years=1.5)
-        expected = (12000 / 10000) ** (1 / 1.5) - 1
-        assert pytest.approx(result, rel=0.001) == expected
-
 
 class TestCalculateMaxDrawdown:
     """最大回撤 (Maximum Drawdown) 計算測試"""
@@ -80,6 +76,30 @@ class TestCalculateMaxDrawdown:
         result = calculate_max_drawdown(values)
         assert pytest.approx(result, rel=0.01) == -0.20
 
+    def test_nan_values_ignored(self):
+        """測試缺值不影響峰值與回撤"""
+        values = pd.Series([np.nan, 100, np.nan, 75, 110, 99])
+        result = calculate_max_drawdown(values)
+        assert pytest.approx(result) == -0.25
+
+    def test_numpy_fallback(self, monkeypatch):
+        """測試未安裝 numba 時的 NumPy 實作結果相同"""
+        monkeypatch.setattr("utils.calculations.NUMBA_AVAILABLE", False)
+        monkeypatch.setattr("utils.calculations.aot_kernels", None)
+        values = pd.Series([np.nan, 100, np.nan, 75, 110, 99])
+        result = calculate_max_drawdown(values)
+        assert pytest.approx(result) == -0.25
+
+    def test_aot_kernels_match_jit(self):
+        """測試預先編譯的核心與 JIT 版本結果相同（需先執行 build_kernels.py）"""
+        aot = pytest.importorskip("utils._aot_kernels")
+        rng = np.random.default_rng(0)
+        values = 10000 * np.cumprod(1 + rng.normal(0, 0.01, 500))
+        values[[0, 100]] = np.nan
+
+        assert aot.max_drawdown(values) == _max_drawdown_loop(values)
+        assert aot.mean_std(values) == _mean_std_loop(values)
+
 
 class TestCalculateVolatility:
     """波動率 (Volatility) 計算測試"""
@@ -107,6 +127,14 @@ class TestCalculateVolatility:
         result = calculate_volatility(returns)
         assert result == 0.0 or np.isnan(result) or result is None
 
+    def test_matches_pandas_std(self):
+        """測試單次走訪的標準差與 pandas 一致（含缺值）"""
+        rng = np.random.default_rng(0)
+        returns = pd.Series(rng.normal(0.001, 0.02, 500))
+        returns[::50] = np.nan
+        expected = returns.std() * np.sqrt(252)
+        assert pytest.approx(calculate_volatility(returns), rel=1e-12) == expected
+
 
 class TestCalculateSharpeRatio:
     """夏普比率 (Sharpe Ratio) 計算測試"""
@@ -169,3 +197,99 @@ class TestCalculateTotalReturn:
         """測試翻倍"""
         result = calculate_total_return(initial_value=10000, final_value=20000)
         assert pytest.approx(result, rel=0.001) == 1.0  # 100%
+
+
+class TestCalculateDailyReturns:
+    """日報酬率計算測試"""
+
+    def test_matches_pct_change(self):
+        """測試含缺值時結果與 pct_change().dropna() 一致"""
+        prices = pd.Series(
+            [100.0, 110.0, np.nan, 99.0, 0.0, 50.0],
+            index=pd.date_range("2020-01-01", periods=6),
+        )
+
+        pd.testing.assert_series_equal(
+            calculate_daily_returns(prices), prices.pct_change().dropna()
+        )
+
+    def test_single_value(self):
+        """測試少於兩筆資料"""
+        returns = calculate_daily_returns(pd.Series([100.0]))
+        assert returns.empty
+        assert returns.dtype == np.float64
+
+    def test_empty_result_not_shared(self):
+        """測試修改空結果不影響之後的呼叫"""
+        returns = calculate_daily_returns(pd.Series([100.0]))
+        returns.loc[0] = 0.5
+        returns.name = "modified"
+
+        again = calculate_daily_returns(pd.Series([100.0]))
+        assert again.empty
+        assert again.name is None
+
+
+class TestArrayConversion:
+    """序列轉陣列測試"""
+
+    def test_strided_series_made_contiguous(self):
+        """測試非連續記憶體的序列轉為連續陣列，連續序列則不複製"""
+        base = np.arange(10, dtype=np.float64)
+        strided = pd.Series(base[::2], copy=False)
+        contiguous = pd.Series(base, copy=False)
+
+        assert _as_array(strided).flags["C_CONTIGUOUS"]
+        np.testing.assert_array_equal(_as_array(strided), base[::2])
+        assert np.shares_memory(_as_array(contiguous), base)
+
+    def test_arrow_backed_series(self):
+        """測試 PyArrow 型別序列（缺值轉為 NaN）"""
+        pytest.importorskip("pyarrow")
+        values = pd.Series([1.0, None, 3.0], dtype="float64[pyarrow]")
+
+        np.testing.assert_array_equal(_as_array(values), [1.0, np.nan, 3.0])
+
+
+class TestCalculateMetrics:
+    """一次計算所有指標測試"""
+
+    def test_matches_individual_functions(self):
+        """測試結果與逐一呼叫各指標函式一致"""
+        rng = np.random.default_rng(0)
+        dates = pd.date_range("2020-01-01", periods=750, freq="B")
+        values = pd.Series(10000 * np.cumprod(1 + rng.normal(0.0005, 0.01, 750)), index=dates)
+        years = (dates[-1] - dates[0]).days / 365.25
+        returns = calculate_daily_returns(values)
+
+        metrics = calculate_metrics(values)
+
+        assert metrics["total_return"] == pytest.approx(
+            calculate_total_return(values.iloc[0], values.iloc[-1])
+        )
+        assert metrics["cagr"] == pytest.approx(
+            calculate_cagr(values.iloc[0], values.iloc[-1], years)
+        )
+        assert metrics["max_drawdown"] == pytest.approx(calculate_max_drawdown(values))
+        assert metrics["volatility"] == pytest.approx(calculate_volatility(returns))
+        assert metrics["sharpe_ratio"] == pytest.approx(calculate_sharpe_ratio(returns))
+
+    def test_empty_series(self):
+        """測試空序列時所有指標為 0"""
+        metrics = calculate_metrics(pd.Series([], dtype=float))
+        assert all(value == 0.0 for value in metrics.values())
+
+    def test_batch_matches_single(self):
+        """測試平行批次計算結果與逐條計算一致且保持順序"""
+        rng = np.random.default_rng(1)
+        dates = pd.date_range("2020-01-01", periods=250, freq="B")
+        curves = [
+            pd.Series(10000 * np.cumprod(1 + rng.normal(0.0005, 0.01, 250)), index=dates)
+            for _ in range(4)
+        ]
+
+        expected = [calculate_metrics(values) for values in curves]
+
+        assert calculate_metrics_batch(curves, workers=2) == expected
+        assert calculate_metrics_batch(curves, workers=1) == expected
+        assert calculate_metrics_batch([]) == []
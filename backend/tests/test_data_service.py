@@ -0,0 +1,147 @@
+"""
+股票資料服務模組的單元測試（yf.download 以假物件取代）
+"""
+import pytest
+import pandas as pd
+import numpy as np
+from unittest.mock import MagicMock
+
+from cachetools.keys import hashkey
+
+from services import data_service
+from services.data_service import get_multiple_stocks_data
+
+START = "2024-01-01"
+END = "2024-02-01"
+
+
+def create_history(close: float = 100.0, days: int = 5) -> pd.DataFrame:
+    """建立含時區索引的模擬 yfinance 歷史資料"""
+    dates = pd.date_range(START, periods=days, freq="B", tz="America/New_York")
+    prices = close + np.arange(days, dtype=float)
+    return pd.DataFrame(
+        {
+            "Open": prices,
+            "High": prices + 1,
+            "Low": prices - 1,
+            "Close": prices,
+            "Volume": np.full(days, 1000.0),
+        },
+        index=dates,
+    )
+
+
+def create_download(histories: dict) -> pd.DataFrame:
+    """組成 group_by="ticker" 格式的 yf.download 結果（第一層為股票代碼）"""
+    return pd.concat(histories, axis=1)
+
+
+class TestGetMultipleStocksData:
+    """批次取得歷史資料測試"""
+
+    @pytest.fixture(autouse=True)
+    def download(self, monkeypatch, tmp_path):
+        """以暫存目錄作為磁碟快取、清空記憶體快取，並取代 yf.download"""
+        import yfinance
+
+        monkeypatch.setattr(data_service, "CACHE_DIR", tmp_path)
+        data_service._data_cache.clear()
+        mock_download = MagicMock()
+        monkeypatch.setattr(yfinance, "download", mock_download)
+        yield mock_download
+        data_service._data_cache.clear()
+
+    def test_single_download_for_all_symbols(self, download):
+        """測試所有股票只呼叫一次 yf.download，並依股票代碼切分欄位"""
+        download.return_value = create_download(
+            {"AAPL": create_history(100.0), "MSFT": create_history(200.0)}
+        )
+
+        results = get_multiple_stocks_data(["AAPL", "MSFT"], START, END)
+
+        download.assert_called_once()
+        assert download.call_args.kwargs["tickers"] == ["AAPL", "MSFT"]
+        assert download.call_args.kwargs["group_by"] == "ticker"
+        assert list(results) == ["AAPL", "MSFT"]
+        assert results["AAPL"]["Close"].iloc[0] == 100.0
+        assert results["MSFT"]["Close"].iloc[0] == 200.0
+        assert list(results["AAPL"].columns) == ["Open", "High", "Low", "Close", "Volume"]
+        assert results["AAPL"].index.tz is None
+
+    def test_flat_columns_single_ticker(self, download):
+        """測試單一股票時的扁平欄位結果"""
+        download.return_value = create_history(50.0)
+
+        results = get_multiple_stocks_data(["QQQ"], START, END)
+
+        assert results["QQQ"]["Close"].iloc[-1] == 54.0
+        assert results["QQQ"].index.tz is None
+
+    def test_missing_and_empty_tickers_none(self, download):
+        """測試無資料（全為 NaN）或未回傳的股票對應 None"""
+        empty = create_history()
+        empty.loc[:, :] = np.nan
+        download.return_value = create_download(
+            {"AAPL": create_history(), "BAD": empty}
+        )
+
+        results = get_multiple_stocks_data(["AAPL", "BAD", "GONE"], START, END)
+
+        assert results["AAPL"] is not None
+        assert results["BAD"] is None
+        assert results["GONE"] is None
+
+    def test_download_error(self, download):
+        """測試下載失敗時未命中快取的股票皆為 None"""
+        download.side_effect = ConnectionError("down")
+
+        assert get_multiple_stocks_data(["AAPL"], START, END) == {"AAPL": None}
+
+    def test_memory_cache_hit_downloads_only_misses(self, download):
+        """測試記憶體快取命中的股票不再下載"""
+        cached = data_service._clean_history(create_history(300.0))
+        data_service._data_cache[hashkey("AAPL", START, END)] = cached
+        download.return_value = create_download({"MSFT": create_history(200.0)})
+
+        results = get_multiple_stocks_data(["AAPL", "MSFT"], START, END)
+
+        assert download.call_args.kwargs["tickers"] == ["MSFT"]
+        assert results["AAPL"] is cached
+        assert results["MSFT"]["Close"].iloc[0] == 200.0
+
+    def test_disk_cache_hit_downloads_only_misses(self, download):
+        """測試磁碟快取命中的股票不再下載，並回填記憶體快取"""
+        data_service._write_cache(
+            "AAPL", START, END, data_service._clean_history(create_history(300.0))
+        )
+        download.return_value = create_download({"MSFT": create_history(200.0)})
+
+        results = get_multiple_stocks_data(["AAPL", "MSFT"], START, END)
+
+        assert download.call_args.kwargs["tickers"] == ["MSFT"]
+        assert results["AAPL"]["Close"].iloc[0] == 300.0
+        assert hashkey("AAPL", START, END) in data_service._data_cache
+
+    def test_downloaded_data_cached(self, download):
+        """測試下載結果寫入快取，再次查詢不再下載"""
+        download.return_value = create_download({"AAPL": create_history()})
+
+        first = get_multiple_stocks_data(["AAPL"], START, END)
+        data_service._data_cache.clear()
+        second = get_multiple_stocks_data(["AAPL"], START, END)
+
+        download.assert_called_once()
+        pd.testing.assert_frame_equal(first["AAPL"], second["AAPL"])
+
+    def test_disk_cache_round_trip(self, tmp_path):
+        """測試磁碟快取以 CSV 儲存，讀回的資料與寫入前完全相同"""
+        data = data_service._clean_history(create_history(100.0 / 3))
+
+        data_service._write_cache("AAPL", START, END, data)
+        path = data_service._cache_path("AAPL", START, END)
+
+        assert path.parent == tmp_path
+        assert path.suffix == ".csv"
+        pd.testing.assert_frame_equal(
+            data_service._read_cache("AAPL", START, END), data, check_freq=False
+        )
@@ -0,0 +1,389 @@
+"""
+預測分析模組的單元測試
+"""
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+from unittest.mock import MagicMock, patch
+
+from api.models import AnalysisSource, Signal, SignalType
+from services.prediction.fundamental import FundamentalAnalyzer
+from services.prediction.orchestrator import FUNDAMENTAL_TIMEOUT, PredictionOrchestrator
+from services.prediction import sentiment
+from services.prediction.sentiment import SentimentAnalyzer, _extract_title_url
+from services.prediction.signals import classify_signal, signal_edges
+from services.prediction.ticker_cache import (
+    CircuitBreaker,
+    CircuitOpenError,
+    DataProviderError,
+    _fetch,
+)
+
+
+class TestFundamentalAnalyzer:
+    """基本面規則表評分測試"""
+
+    def _analyze(self, info):
+        with patch("services.prediction.fundamental.get_info_fields", return_value=info):
+            return FundamentalAnalyzer().analyze("TEST")
+
+    def test_strong_fundamentals(self):
+        """測試各項指標皆佳時為看多"""
+        signal = self._analyze({
+            "trailingPE": 10.0,
+            "priceToBook": 1.2,
+            "returnOnEquity": 0.25,
+        })
+
+        assert signal.signal_type == SignalType.BULLISH
+        assert signal.score == 0.8
+        assert signal.reason == "低本益比 (10.00) | 低股價淨值比 (1.20) | 極佳 ROE (25.00%)"
+
+    def test_first_matching_rule_only(self):
+        """測試同一欄位只採用第一個符合的條件"""
+        # ROE 0.25 同時大於 0.20 與 0.15，只應加 0.3
+        signal = self._analyze({"returnOnEquity": 0.25})
+
+        assert signal.score == 0.3
+
+    def test_weak_fundamentals(self):
+        """測試各項指標皆差時為看空"""
+        signal = self._analyze({
+            "trailingPE": 60.0,
+            "returnOnEquity": -0.1,
+            "debtToEquity": 250.0,
+        })
+
+        assert signal.signal_type == SignalType.BEARISH
+        assert signal.score == pytest.approx(-0.6)
+        assert "高負債比 (250.00%)" in signal.reason
+
+    def test_analyze_many(self):
+        """測試批次分析每檔股票各自評分"""
+        infos = {"A": {"trailingPE": 10.0}, "B": {"trailingPE": 60.0}}
+        with patch(
+            "services.prediction.fundamental.get_info_fields",
+            side_effect=lambda symbol, fields: infos[symbol],
+        ):
+            signals = FundamentalAnalyzer().analyze_many(["A", "B", "A"])
+
+        assert list(signals) == ["A", "B"]
+        assert signals["A"].score == 0.3
+        assert signals["B"].score == -0.2
+
+    def test_analyze_many_isolates_failures(self):
+        """測試批次分析中單一股票的非預期例外只影響該股票"""
+        # 字串與數字比較會拋出 TypeError，analyze 本身不攔截
+        infos = {
+            "GOOD": {"trailingPE": 10.0, "returnOnEquity": 0.25},
+            "BAD": {"trailingPE": "Infinity"},
+        }
+        with patch(
+            "services.prediction.fundamental.get_info_fields",
+            side_effect=lambda symbol, fields: infos[symbol],
+        ):
+            signals = FundamentalAnalyzer().analyze_many(["GOOD", "BAD"])
+
+        assert signals["GOOD"].score == 0.6
+        assert isinstance(signals["BAD"], TypeError)
+
+    def test_analyze_many_timeout(self):
+        """測試批次逾時時已完成的股票保留結果，未完成的以 TimeoutError 表示"""
+        def get_info_fields(symbol, fields):
+            if symbol == "SLOW":
+                time.sleep(0.5)
+            return {"trailingPE": 10.0}
+
+        with patch("services.prediction.fundamental.get_info_fields", side_effect=get_info_fields):
+            signals = FundamentalAnalyzer().analyze_many(["FAST", "SLOW"], timeout=0.1)
+
+        assert signals["FAST"].score == 0.3
+        assert isinstance(signals["SLOW"], TimeoutError)
+
+    def test_missing_data(self):
+        """測試缺乏數據時為中性"""
+        signal = self._analyze({})
+
+        assert signal.signal_type == SignalType.NEUTRAL
+        assert signal.score == 0.0
+        assert signal.reason == "基本面數據平平或缺乏數據"
+
+
+class TestNewsParsing:
+    """yfinance 新聞結構解析測試"""
+
+    def test_nested_content(self):
+        """測試新版巢狀 content 結構"""
+        item = {"content": {"title": "標題", "clickThroughUrl": {"url": "https://a"}}}
+        assert _extract_title_url(item) == ("標題", "https://a")
+
+    def test_nested_content_without_url(self):
+        """測試巢狀結構缺少連結"""
+        item = {"content": {"title": "標題", "clickThroughUrl": None}}
+        assert _extract_title_url(item) == ("標題", "#")
+
+    def test_flat_item(self):
+        """測試舊版扁平結構"""
+        assert _extract_title_url({"title": "標題", "link": "https://b"}) == ("標題", "https://b")
+        assert _extract_title_url({}) == ("", "#")
+
+
+class TestSentimentAnalyzer:
+    """消息面分析測試（FinBERT 以假物件取代）"""
+
+    @pytest.fixture(autouse=True)
+    def finbert(self):
+        """固定回傳 (negative, neutral, positive) = (0.1, 0.1, 0.8) 的假 FinBERT"""
+        service = MagicMock()
+        service.analyze_sentiment.side_effect = (
+            lambda texts: np.tile([0.1, 0.1, 0.8], (len(texts), 1))
+        )
+        sentiment._score_cache.clear()
+        with patch.object(sentiment, "get_finbert_service", return_value=service):
+            yield service
+
+    def _analyze(self, news):
+        with patch.object(sentiment, "get_news", return_value=news):
+            return SentimentAnalyzer().analyze("TEST")
+
+    def test_invalid_titles_skip_model(self, finbert):
+        """測試標題皆無效時不呼叫模型"""
+        signal = self._analyze([{"title": ""}, {"title": "  ab  "}])
+
+        assert signal.signal_type == SignalType.NEUTRAL
+        assert signal.reason == "無有效新聞標題"
+        finbert.analyze_sentiment.assert_not_called()
+
+    def test_scores_cached_by_title(self, finbert):
+        """測試相同標題只送入模型一次"""
+        news = [{"title": "Chip demand surges"}, {"title": "Chip demand surges "}]
+
+        first = self._analyze(news)
+        second = self._analyze(news)
+
+        assert first.score == second.score == 0.7
+        finbert.analyze_sentiment.assert_called_once_with(["Chip demand surges"])
+
+
+class TestPredictionOrchestrator:
+    """預測協調器快取測試"""
+
+    def _orchestrator(self):
+        orchestrator = PredictionOrchestrator()
+        signal = Signal(
+            source=AnalysisSource.FUNDAMENTAL,
+            signal_type=SignalType.NEUTRAL,
+            score=0.0,
+            confidence=0.5,
+            reason="測試",
+        )
+        orchestrator.fundamental.analyze = MagicMock(return_value=signal)
+        orchestrator.fundamental.analyze_many = MagicMock(
+            side_effect=lambda symbols, timeout=None: {s: signal for s in symbols}
+        )
+        orchestrator.sentiment.analyze = MagicMock(return_value=signal)
+        return orchestrator
+
+    def test_concurrent_requests_share_computation(self):
+        """測試同一股票的並行請求只計算一次"""
+        orchestrator = self._orchestrator()
+
+        async def run():
+            return await asyncio.gather(
+                *(orchestrator.predict("AAPL") for _ in range(3))
+            )
+
+        results = asyncio.run(run())
+
+        assert orchestrator.fundamental.analyze.call_count == 1
+        assert all(r is results[0] for r in results)
+
+    def test_cached_result_reused(self):
+        """測試 TTL 內重複查詢返回快取結果"""
+        orchestrator = self._orchestrator()
+
+        first = asyncio.run(orchestrator.predict("AAPL"))
+        second = asyncio.run(orchestrator.predict("AAPL"))
+
+        assert first is second
+        assert orchestrator.sentiment.analyze.call_count == 1
+
+    def test_predict_many(self):
+        """測試批次預測：基本面只呼叫一次批次分析，並沿用已快取結果"""
+        orchestrator = self._orchestrator()
+        cached = asyncio.run(orchestrator.predict("AAPL"))
+
+        results = asyncio.run(orchestrator.predict_many(["AAPL", "MSFT", "2330.TW"]))
+
+        assert list(results) == ["AAPL", "MSFT", "2330.TW"]
+        assert results["AAPL"] is cached
+        orchestrator.fundamental.analyze_many.assert_called_once_with(
+            ["MSFT", "2330.TW"], FUNDAMENTAL_TIMEOUT
+        )
+        assert results["MSFT"].symbol == "MSFT"
+
+    def test_predict_many_isolates_failures(self):
+        """測試批次預測中單一股票基本面失敗不影響其他股票"""
+        orchestrator = self._orchestrator()
+        infos = {
+            "GOOD": {"trailingPE": 10.0, "returnOnEquity": 0.25},
+            "BAD": {"trailingPE": "Infinity"},
+        }
+        orchestrator.fundamental = FundamentalAnalyzer()
+
+        with patch(
+            "services.prediction.fundamental.get_info_fields",
+            side_effect=lambda symbol, fields: infos[symbol],
+        ):
+            results = asyncio.run(orchestrator.predict_many(["GOOD", "BAD"]))
+
+        assert results["GOOD"].signals[0].score == 0.6
+        assert results["BAD"].signals[0].reason.startswith("基本面分析失敗")
+
+    def test_slow_provider_times_out(self):
+        """測試分析器逾時時降級為中性訊號，不影響另一個分析器"""
+        orchestrator = self._orchestrator()
+        orchestrator.sentiment.analyze = MagicMock(side_effect=lambda s: time.sleep(0.5))
+
+        with patch("services.prediction.orchestrator.SENTIMENT_TIMEOUT", 0.05):
+            result = asyncio.run(orchestrator.predict("AAPL"))
+
+        fund_signal, sent_signal = result.signals
+        assert fund_signal.confidence == 0.5
+        assert sent_signal.reason == "消息面分析超時"
+        assert sent_signal.signal_type == SignalType.NEUTRAL
+
+    def test_degraded_result_not_cached(self):
+        """測試有分析器失敗的降級結果不寫入快取，下次查詢重新分析"""
+        orchestrator = self._orchestrator()
+        signal = orchestrator.sentiment.analyze.return_value
+        orchestrator.sentiment.analyze.side_effect = [RuntimeError("down"), signal]
+
+        degraded = asyncio.run(orchestrator.predict("AAPL"))
+        recovered = asyncio.run(orchestrator.predict("AAPL"))
+
+        assert degraded.signals[1].reason.startswith("消息面分析失敗")
+        assert recovered.signals[1] is signal
+        assert orchestrator.sentiment.analyze.call_count == 2
+        assert asyncio.run(orchestrator.predict("AAPL")) is recovered
+
+    def test_predict_many_degraded_result_not_cached(self):
+        """測試批次預測中基本面逾時的股票不寫入快取"""
+        orchestrator = self._orchestrator()
+        signal = orchestrator.sentiment.analyze.return_value
+        orchestrator.fundamental.analyze_many.side_effect = (
+            lambda symbols, timeout=None: {"AAPL": signal, "MSFT": TimeoutError()}
+        )
+
+        asyncio.run(orchestrator.predict_many(["AAPL", "MSFT"]))
+
+        assert "AAPL" in orchestrator._cache
+        assert "MSFT" not in orchestrator._cache
+
+
+class TestDataProviderResilience:
+    """yfinance 重試與斷路器測試"""
+
+    def test_rate_limit_retried(self):
+        """測試流量限制時重試後成功"""
+        from yfinance.exceptions import YFRateLimitError
+
+        func = MagicMock(side_effect=[YFRateLimitError(), {"ok": True}])
+        with patch("services.prediction.ticker_cache.time.sleep") as mock_sleep:
+            assert _fetch("info", "TEST", func) == {"ok": True}
+
+        assert func.call_count == 2
+        mock_sleep.assert_called_once_with(1)
+
+    def test_network_error_wrapped(self):
+        """測試網路錯誤不重試並轉為 DataProviderError"""
+        func = MagicMock(side_effect=ConnectionError("down"))
+
+        with pytest.raises(DataProviderError):
+            _fetch("info", "TEST", func)
+        assert func.call_count == 1
+
+    def test_circuit_opens_after_failures(self):
+        """測試連續失敗後斷路器開啟，不再呼叫資料來源"""
+        breaker = CircuitBreaker("test", fail_max=2, reset_timeout=60)
+        func = MagicMock(side_effect=DataProviderError("down"))
+
+        for _ in range(2):
+            with pytest.raises(DataProviderError):
+                breaker.call(func)
+        with pytest.raises(CircuitOpenError):
+            breaker.call(func)
+
+        assert func.call_count == 2
+
+    def test_circuit_half_open_recovers(self):
+        """測試重置時間過後放行試探，成功即關閉"""
+        breaker = CircuitBreaker("test", fail_max=1, reset_timeout=0)
+        with pytest.raises(DataProviderError):
+            breaker.call(MagicMock(side_effect=DataProviderError("down")))
+
+        assert breaker.call(lambda: "ok") == "ok"
+        assert breaker.call(lambda: "ok") == "ok"
+
+    def test_circuit_half_open_single_probe(self):
+        """測試半開時只放行一次試探，試探進行中的其他呼叫直接失敗"""
+        breaker = CircuitBreaker("test", fail_max=1, reset_timeout=0)
+        with pytest.raises(DataProviderError):
+            breaker.call(MagicMock(side_effect=DataProviderError("down")))
+
+        started, release = threading.Event(), threading.Event()
+
+        def probe():
+            started.set()
+            release.wait(5)
+            return "ok"
+
+        results = {}
+        thread = threading.Thread(
+            target=lambda: results.setdefault("probe", breaker.call(probe))
+        )
+        thread.start()
+        assert started.wait(5)
+
+        other = MagicMock(return_value="other")
+        with pytest.raises(CircuitOpenError):
+            breaker.call(other)
+        release.set()
+        thread.join(5)
+
+        assert results["probe"] == "ok"
+        other.assert_not_called()
+        assert breaker.call(other) == "other"
+
+    def test_circuit_half_open_probe_failure_reopens(self):
+        """測試試探失敗後斷路器再次開啟"""
+        breaker = CircuitBreaker("test", fail_max=2, reset_timeout=0)
+        func = MagicMock(side_effect=DataProviderError("down"))
+        for _ in range(3):
+            with pytest.raises(DataProviderError):
+                breaker.call(func)
+        breaker.reset_timeout = 60
+
+        with pytest.raises(CircuitOpenError):
+            breaker.call(func)
+        assert func.call_count == 3
+
+
+class TestSignalClassification:
+    """分數 → 訊號類型分類測試"""
+
+    @pytest.mark.parametrize("score, expected", [
+        (0.25, SignalType.BULLISH),
+        (0.2499, SignalType.NEUTRAL),
+        (0.0, SignalType.NEUTRAL),
+        (-0.2499, SignalType.NEUTRAL),
+        (-0.25, SignalType.BEARISH),
+        (1.0, SignalType.BULLISH),
+        (-1.0, SignalType.BEARISH),
+    ])
+    def test_threshold_inclusive(self, score, expected):
+        """測試門檻兩端皆含等號"""
+        assert classify_signal(score, signal_edges(0.25)) == expected
@@ -7,10 +7,45 @@
 - Volatility (波動率)
 - Sharpe Ratio (夏普比率)
 - Total Return (總報酬率)
+
+calculate_metrics 一次計算上述所有指標；
+calculate_metrics_batch 以多個行程平行計算多條權益曲線
 """
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
-from typing import Union
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from utils.jit import NUMBA_AVAILABLE, aot_kernels, njit
+
+# 年化常數：每年交易日數與其平方根（模組載入時計算一次）
+TRADING_DAYS = 252
+SQRT_TRADING_DAYS = math.sqrt(TRADING_DAYS)
+
+# 資料不足時回傳的空報酬率序列，以淺複製取代每次重新建構 Series 與 Index
+_EMPTY_RETURNS = pd.Series([], dtype=np.float64)
+
+
+def _as_array(series: pd.Series, dtype: np.dtype = np.float64) -> np.ndarray:
+    """
+    將序列轉為連續記憶體的浮點數陣列，來源已是該型別時不複製
+
+    PyArrow 型別（ArrowDtype）的序列先以 astype 轉為 NumPy 型別，
+    避免 to_numpy 經由物件陣列多複製一次
+
+    Args:
+        series: 數值序列
+        dtype: 目標型別
+
+    Returns:
+        C 連續的一維陣列
+    """
+    if hasattr(series.dtype, "pyarrow_dtype"):
+        series = series.astype(dtype, copy=False)
+    return np.ascontiguousarray(series.to_numpy(dtype=dtype, copy=False))
 
 
 def calculate_total_return(initial_value: float, final_value: float) -> float:
@@ -26,6 +61,8 @@ def calculate_total_return(initial_value: float, final_value: float) -> float:
     """
     if initial_value <= 0:
         return 0.0
+    # 保留先減後除：兩值相近時相減沒有誤差，只在除法捨入一次；
+    # final_value / initial_value - 1 在報酬率接近 0 時會放大除法的捨入誤差
     return (final_value - initial_value) / initial_value
 
 
@@ -49,6 +86,8 @@ def calculate_cagr(initial_value: float, final_value: float, years: float) -> fl
     if final_value <= 0:
         return -1.0  # 完全虧損
 
+    # 保留 ** 運算：CPython 的 float.__pow__ 直接呼叫 C 的 pow()，
+    # 比 math.exp(math.log(x) / years) 快且不會多出 1~2 ulp 的誤差
     return (final_value / initial_value) ** (1 / years) - 1
 
 
@@ -69,18 +108,52 @@ def calculate_max_drawdown(portfolio_values: pd.Series) -> float:
     if len(portfolio_values) == 0:
         return 0.0
 
-    # 計算累積最大值（峰值）
-    peak = portfolio_values.expanding(min_periods=1).max()
+    values = _as_array(portfolio_values)
+    if aot_kernels is not None:
+        return aot_kernels.max_drawdown(values)
+    if NUMBA_AVAILABLE:
+        return _max_drawdown_loop(values)
+
+    # 計算累積最大值（峰值），fmax 忽略 NaN（同 expanding().max()）
+    peak = np.fmax.accumulate(values)
 
-    # 計算每個時點的回撤
-    drawdown = (portfolio_values - peak) / peak
+    # 峰值單調不減，(value - peak) / peak 的最小值即 min(value / peak) - 1：
+    # 直接覆寫峰值陣列求比值，省去一次相減與暫存陣列
+    # （峰值為 0 時得到 inf / NaN，與 pandas 相同）
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.divide(values, peak, out=peak)
 
-    # 返回最大回撤（最小值，因為是負數）
-    max_dd = drawdown.min()
+    # fmin 略過 NaN；全為 NaN 時得到 inf，結果為 0
+    max_dd = float(np.fmin.reduce(ratio, initial=np.inf)) - 1.0
 
     return max_dd if max_dd < 0 else 0.0
 
 
+@njit(cache=True, nogil=True, error_model="numpy")
+def _max_drawdown_loop(values: np.ndarray) -> float:
+    """
+    單次走訪計算最大回撤（供 numba 編譯）
+
+    峰值忽略 NaN（同 expanding().max()），回撤為 NaN 時略過（同 Series.min()）；
+    不使用 fastmath，並以 numpy 錯誤模式讓峰值為 0 時的除法得到 inf / NaN 而非例外
+
+    Args:
+        values: 投資組合價值陣列
+
+    Returns:
+        最大回撤（<= 0）
+    """
+    peak = np.nan
+    max_dd = 0.0
+    for value in values:
+        if np.isnan(peak) or value > peak:
+            peak = value
+        drawdown = (value - peak) / peak
+        if drawdown < max_dd:
+            max_dd = drawdown
+    return max_dd
+
+
 def calculate_volatility(returns: pd.Series) -> float:
     """
     計算年化波動率 (Annualized Volatility)
@@ -96,14 +169,8 @@ def calculate_volatility(returns: pd.Series) -> float:
     if len(returns) == 0:
         return 0.0
 
-    daily_std = returns.std()
-
-    # 處理 NaN 或極小值（避免浮點數精度問題）
-    if pd.isna(daily_std) or daily_std < 1e-10:
-        return 0.0
-
-    # 年化：乘以交易日數的平方根（252個交易日）
-    return daily_std * np.sqrt(252)
+    _, daily_std = _mean_std(_as_array(returns))
+    return _annualize_std(daily_std)
 
 
 def calculate_sharpe_ratio(
@@ -126,13 +193,15 @@ def calculate_sharpe_ratio(
     if len(returns) == 0:
         return 0.0
 
-    volatility = calculate_volatility(returns)
+    # 平均與標準差一次走訪取得
+    mean, daily_std = _mean_std(_as_array(returns))
+    volatility = _annualize_std(daily_std)
 
-    if volatility == 0 or pd.isna(volatility):
+    if volatility == 0:
         return 0.0
 
     # 計算年化報酬率
-    annual_return = returns.mean() * 252
+    annual_return = mean * TRADING_DAYS
 
     # 計算超額報酬
     excess_return = annual_return - risk_free_rate
@@ -140,6 +209,62 @@ def calculate_sharpe_ratio(
     return excess_return / volatility
 
 
+def _annualize_std(daily_std: float) -> float:
+    """將日報酬標準差年化，NaN 或極小值（浮點數精度問題）視為 0"""
+    if math.isnan(daily_std) or daily_std < 1e-10:
+        return 0.0
+
+    # 年化：乘以交易日數的平方根（252個交易日）
+    return daily_std * SQRT_TRADING_DAYS
+
+
+@njit(cache=True, nogil=True)
+def _mean_std_loop(values: np.ndarray) -> Tuple[float, float]:
+    """
+    以 Welford 演算法單次走訪計算平均與標準差（供 numba 編譯）
+
+    略過 NaN，標準差使用 ddof=1（同 pandas），有效值少於 2 個時標準差為 NaN
+
+    Args:
+        values: 日報酬率陣列
+
+    Returns:
+        (mean, std)
+    """
+    n = 0
+    mean = 0.0
+    m2 = 0.0
+    for value in values:
+        if np.isnan(value):
+            continue
+        n += 1
+        delta = value - mean
+        mean += delta / n
+        m2 += delta * (value - mean)
+
+    if n == 0:
+        return np.nan, np.nan
+    if n < 2:
+        return mean, np.nan
+    return mean, np.sqrt(m2 / (n - 1))
+
+
+def _mean_std_numpy(values: np.ndarray) -> Tuple[float, float]:
+    """以 NumPy 計算平均與標準差（numba 未安裝時使用，語意同 _mean_std_loop）"""
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return np.nan, np.nan
+    if values.size < 2:
+        return float(values[0]), np.nan
+    return float(values.mean()), float(values.std(ddof=1))
+
+
+if aot_kernels is not None:
+    _mean_std = aot_kernels.mean_std
+else:
+    _mean_std = _mean_std_loop if NUMBA_AVAILABLE else _mean_std_numpy
+
+
 def calculate_daily_returns(prices: pd.Series) -> pd.Series:
     """
     從價格序列計算日報酬率
@@ -151,6 +276,271 @@ def calculate_daily_returns(prices: pd.Series) -> pd.Series:
         日報酬率序列
     """
     if len(prices) < 2:
-        return pd.Series([], dtype=float)
+        # 淺複製：呼叫端修改名稱或新增資料只作用在複本上，不會影響共用的空序列
+        return _EMPTY_RETURNS.copy(deep=False)
+
+    # 直接以 NumPy 相減再相除，不建立 pct_change / dropna 的中間 Series
+    values = _as_array(prices)
+    returns = np.empty(len(values) - 1, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        np.subtract(values[1:], values[:-1], out=returns)
+        np.divide(returns, values[:-1], out=returns)
+    index = prices.index[1:]
+
+    # 與 dropna 相同：排除缺值造成的 NaN 報酬率
+    valid = ~np.isnan(returns)
+    if not valid.all():
+        returns, index = returns[valid], index[valid]
+
+    return pd.Series(returns, index=index, copy=False)
+
+
+def calculate_metrics_from_arrays(
+    portfolio_values: np.ndarray,
+    prices: np.ndarray,
+    initial_value: float,
+    years: float,
+    risk_free_rate: float = 0.02,
+) -> Tuple[float, float, float, float, float, float]:
+    """
+    在 float64 陣列上一次計算所有財務指標（calculate_metrics 與回測服務共用）
+
+    已預先編譯（build_kernels.py）或安裝 numba 時以單次走訪的編譯迴圈計算，
+    否則使用 NumPy 向量化實作
+
+    Args:
+        portfolio_values: 每日投資組合價值（峰值 <= 0 的區段不計入回撤，例如 DCA 首次投入前）
+        prices: 用於計算日報酬率的價格序列
+        initial_value: 計算總報酬率與 CAGR 的初始金額（回測時為總投入金額）
+        years: 投資年數
+        risk_free_rate: 無風險利率（年化，預設 2%）
+
+    Returns:
+        (final_value, total_return, cagr, max_drawdown, volatility, sharpe_ratio)，皆為小數形式
+    """
+    return _metrics_kernel(
+        portfolio_values,
+        prices,
+        float(initial_value),
+        float(years),
+        float(risk_free_rate),
+    )
+
+
+def _metrics_numpy(
+    portfolio_values: np.ndarray,
+    prices: np.ndarray,
+    initial_value: float,
+    years: float,
+    risk_free_rate: float,
+) -> Tuple[float, float, float, float, float, float]:
+    """
+    以 NumPy 向量化計算所有指標（numba 未安裝時使用）
+
+    Returns:
+        (final_value, total_return, cagr, max_drawdown, volatility, sharpe_ratio)
+    """
+    final_value = float(portfolio_values[-1])
+    total_return = calculate_total_return(initial_value, final_value)
+    cagr = calculate_cagr(initial_value, final_value, years)
+
+    # 最大回撤：以累積最大值為峰值（忽略峰值為 0 的區段，例如 DCA 首次投入前）
+    peak = np.fmax.accumulate(portfolio_values)
+    valid = peak > 0
+    drawdown = (portfolio_values[valid] - peak[valid]) / peak[valid]
+    drawdown = drawdown[~np.isnan(drawdown)]
+    max_drawdown = min(float(drawdown.min()), 0.0) if drawdown.size else 0.0
+
+    # 日報酬率
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.diff(prices) / prices[:-1]
+    returns = returns[~np.isnan(returns)]
+
+    # 波動率與夏普比率（標準差與 pandas 相同使用 ddof=1）
+    volatility = 0.0
+    sharpe_ratio = 0.0
+    if returns.size >= 2:
+        daily_std = float(returns.std(ddof=1))
+        if daily_std >= 1e-10:
+            volatility = daily_std * SQRT_TRADING_DAYS
+            annual_return = float(returns.mean()) * TRADING_DAYS
+            sharpe_ratio = (annual_return - risk_free_rate) / volatility
+
+    return final_value, total_return, cagr, max_drawdown, volatility, sharpe_ratio
+
+
+@njit(cache=True, nogil=True, error_model="numpy")
+def _metrics_loop(
+    portfolio_values: np.ndarray,
+    prices: np.ndarray,
+    initial_value: float,
+    years: float,
+    risk_free_rate: float,
+) -> Tuple[float, float, float, float, float, float]:
+    """
+    以逐元素迴圈計算所有指標（供 numba 編譯，語意與 _metrics_numpy 相同）
+
+    不使用 fastmath：資料中的 NaN 必須被正確略過；
+    numpy 錯誤模式讓價格為 0 時的除法得到 inf / NaN（同 NumPy）而非例外；
+    nogil 讓多個回測執行緒（asyncio.to_thread）同時執行此核心
+
+    Returns:
+        (final_value, total_return, cagr, max_drawdown, volatility, sharpe_ratio)
+    """
+    final_value = portfolio_values[-1]
+
+    total_return = 0.0
+    if initial_value > 0:
+        total_return = (final_value - initial_value) / initial_value
+
+    cagr = 0.0
+    if years > 0 and initial_value > 0:
+        if final_value <= 0:
+            cagr = -1.0
+        else:
+            cagr = (final_value / initial_value) ** (1.0 / years) - 1.0
+
+    # 最大回撤：峰值忽略 NaN（同 np.fmax.accumulate），並略過峰值 <= 0 的區段
+    peak = np.nan
+    max_drawdown = 0.0
+    for value in portfolio_values:
+        if np.isnan(peak) or value > peak:
+            peak = value
+        if peak > 0:
+            drawdown = (value - peak) / peak
+            if drawdown < max_drawdown:
+                max_drawdown = drawdown
+
+    # 日報酬率：先求平均，再以 ddof=1 計算標準差
+    count = 0
+    total = 0.0
+    for i in range(prices.size - 1):
+        r = (prices[i + 1] - prices[i]) / prices[i]
+        if not np.isnan(r):
+            count += 1
+            total += r
+
+    volatility = 0.0
+    sharpe_ratio = 0.0
+    if count >= 2:
+        mean = total / count
+        squared = 0.0
+        for i in range(prices.size - 1):
+            r = (prices[i + 1] - prices[i]) / prices[i]
+            if not np.isnan(r):
+                squared += (r - mean) ** 2
+        daily_std = np.sqrt(squared / (count - 1))
+        if daily_std >= 1e-10:
+            volatility = daily_std * SQRT_TRADING_DAYS
+            sharpe_ratio = (mean * TRADING_DAYS - risk_free_rate) / volatility
+
+    return final_value, total_return, cagr, max_drawdown, volatility, sharpe_ratio
+
+
+
+if aot_kernels is not None:
+    # build_kernels.py 預先編譯的版本，不需 JIT
+    _metrics_kernel = aot_kernels.metrics
+elif NUMBA_AVAILABLE:
+    _metrics_kernel = _metrics_loop
+    # 匯入時先以假資料觸發編譯（或載入快取），避免第一個請求承擔 JIT 成本
+    _metrics_kernel(np.ones(2), np.ones(2), 1.0, 1.0, 0.0)
+else:
+    _metrics_kernel = _metrics_numpy
+
+
+def calculate_metrics(
+    portfolio_values: pd.Series,
+    years: Optional[float] = None,
+    risk_free_rate: float = 0.02,
+) -> Dict[str, float]:
+    """
+    一次計算所有財務指標
+
+    只轉換一次陣列，並以回測服務共用的核心（calculate_metrics_from_arrays）
+    單次走訪計算，避免逐一呼叫各指標函式時重複轉換與走訪相同資料；
+    與回測相同，峰值 <= 0 的區段不計入最大回撤
+
+    Args:
+        portfolio_values: 投資組合價值的時間序列
+        years: 投資年數；未提供時由 DatetimeIndex 的起訖日計算（days / 365.25）
+        risk_free_rate: 無風險利率（年化，預設 2%）
 
-    return prices.pct_change().dropna()
+    Returns:
+        {total_return, cagr, max_drawdown, volatility, sharpe_ratio}，皆為小數形式
+    """
+    if len(portfolio_values) == 0:
+        return {
+            "total_return": 0.0,
+            "cagr": 0.0,
+            "max_drawdown": 0.0,
+            "volatility": 0.0,
+            "sharpe_ratio": 0.0,
+        }
+
+    values = _as_array(portfolio_values)
+
+    if years is None:
+        index = portfolio_values.index
+        years = (
+            (index[-1] - index[0]).days / 365.25
+            if isinstance(index, pd.DatetimeIndex)
+            else 0.0
+        )
+
+    # 以首日價值為初始金額，日報酬率亦由權益曲線本身計算
+    _, total_return, cagr, max_drawdown, volatility, sharpe_ratio = (
+        calculate_metrics_from_arrays(values, values, values[0], years, risk_free_rate)
+    )
+
+    return {
+        "total_return": total_return,
+        "cagr": cagr,
+        "max_drawdown": max_drawdown,
+        "volatility": volatility,
+        "sharpe_ratio": sharpe_ratio,
+    }
+
+
+def _warm_up_kernels() -> None:
+    """子行程初始化：先呼叫一次各 JIT 核心，避免第一個任務承擔編譯 / 載入快取的時間"""
+    calculate_metrics(pd.Series([1.0, 1.1, 1.0]), years=1.0)
+
+
+def calculate_metrics_batch(
+    portfolio_values_list: Sequence[pd.Series],
+    risk_free_rate: float = 0.02,
+    workers: Optional[int] = None,
+) -> List[Dict[str, float]]:
+    """
+    平行計算多條權益曲線的財務指標（如參數網格掃描）
+
+    各指標函式無副作用，每條曲線可獨立計算；
+    只有一條曲線或 workers=1 時直接在目前行程計算，省去建立行程池的成本
+
+    Args:
+        portfolio_values_list: 多條投資組合價值時間序列
+        risk_free_rate: 無風險利率（年化，預設 2%）
+        workers: 行程數，預設為 CPU 核心數
+
+    Returns:
+        與輸入順序相同的指標字典列表，格式同 calculate_metrics
+    """
+    workers = min(workers or os.cpu_count() or 1, len(portfolio_values_list))
+    if workers <= 1:
+        return [
+            calculate_metrics(values, risk_free_rate=risk_free_rate)
+            for values in portfolio_values_list
+        ]
+
+    # 每次分派多條曲線給同一行程，減少行程間序列化往返
+    chunksize = max(1, len(portfolio_values_list) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_warm_up_kernels) as executor:
+        results = executor.map(
+            calculate_metrics,
+            portfolio_values_list,
+            [None] * len(portfolio_values_list),
+            [risk_free_rate] * len(portfolio_values_list),
+            chunksize=chunksize,
+        )
+        return list(results)
@@ -0,0 +1,34 @@
+"""
+Numba JIT 編譯工具
+
+numba 為選用依賴：已安裝時以 njit 編譯數值迴圈，
+未安裝時 njit 退化為不做任何事的裝飾器，呼叫端可依 NUMBA_AVAILABLE
+改用 NumPy 向量化實作。
+
+aot_kernels 為 build_kernels.py 預先編譯的原生擴充模組（utils/_aot_kernels），
+匯入時不需 JIT 編譯或載入快取；未產生時為 None。
+修改核心函式後需重新執行 build_kernels.py，否則會沿用舊的編譯結果。
+"""
+
+try:
+    from numba import njit
+
+    NUMBA_AVAILABLE = True
+except ImportError:  # pragma: no cover - 依安裝環境而定
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """numba 未安裝時的替代裝飾器，直接回傳原函式"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def decorator(func):
+            return func
+
+        return decorator
+
+
+try:
+    from utils import _aot_kernels as aot_kernels
+except ImportError:
+    aot_kernels = None
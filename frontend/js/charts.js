@@ -106,9 +106,9 @@ const Charts = (function() {
 
         const datasets = results.map((result, index) => ({
             label: `${result.symbol} ${result.name ? '(' + result.name + ')' : ''}`,
-            data: result.portfolio_history.map(h => ({
-                x: h.date,
-                y: h.value,
+            data: result.portfolio_history.dates.map((date, i) => ({
+                x: date,
+                y: result.portfolio_history.values[i],
             })),
             borderColor: getColor(index),
             backgroundColor: getColorWithAlpha(index, 0.1),
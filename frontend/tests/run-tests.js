@@ -226,10 +226,10 @@ describe('回測結果格式', () => {
         sharpe_ratio: 1.15,
         final_value: 250500,
         total_invested: 100000,
-        portfolio_history: [
-            { date: '2020-01-01', value: 100000 },
-            { date: '2024-12-31', value: 250500 }
-        ]
+        portfolio_history: {
+            dates: ['2020-01-01', '2024-12-31'],
+            values: [100000, 250500]
+        }
     };
 
     test('結果應該有 symbol 屬性', () => {
@@ -255,15 +255,16 @@ describe('回測結果格式', () => {
         assert.true(mockResult.volatility >= 0);
     });
 
-    test('portfolio_history 應該是陣列', () => {
-        assert.isArray(mockResult.portfolio_history);
+    test('portfolio_history 應該有 dates 和 values 陣列', () => {
+        assert.isArray(mockResult.portfolio_history.dates);
+        assert.isArray(mockResult.portfolio_history.values);
     });
 
-    test('portfolio_history 項目應該有 date 和 value', () => {
-        mockResult.portfolio_history.forEach(item => {
-            assert.hasProperty(item, 'date');
-            assert.hasProperty(item, 'value');
-        });
+    test('portfolio_history 的 dates 與 values 長度應該相同', () => {
+        assert.equal(
+            mockResult.portfolio_history.dates.length,
+            mockResult.portfolio_history.values.length
+        );
     });
 });
 
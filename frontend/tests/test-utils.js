@@ -97,10 +97,10 @@ describe('回測結果格式驗證', function() {
         sharpe_ratio: 1.15,
         final_value: 250500,
         total_invested: 100000,
-        portfolio_history: [
-            { date: '2020-01-01', value: 100000 },
-            { date: '2024-12-31', value: 250500 }
-        ]
+        portfolio_history: {
+            dates: ['2020-01-01', '2024-12-31'],
+            values: [100000, 250500]
+        }
     };
 
     it('結果應該有 symbol 屬性', function() {
@@ -143,14 +143,16 @@ describe('回測結果格式驗證', function() {
 
     it('結果應該有 portfolio_history 屬性', function() {
         assert.hasProperty(mockResult, 'portfolio_history');
-        assert.isArray(mockResult.portfolio_history);
+        assert.isObject(mockResult.portfolio_history);
     });
 
-    it('portfolio_history 項目應該有 date 和 value', function() {
-        mockResult.portfolio_history.forEach(function(item) {
-            assert.hasProperty(item, 'date');
-            assert.hasProperty(item, 'value');
-        });
+    it('portfolio_history 應該有等長的 dates 和 values', function() {
+        assert.isArray(mockResult.portfolio_history.dates);
+        assert.isArray(mockResult.portfolio_history.values);
+        assert.equal(
+            mockResult.portfolio_history.dates.length,
+            mockResult.portfolio_history.values.length
+        );
     });
 
     it('final_value 應該大於等於 0', function() {